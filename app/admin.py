@@ -7,6 +7,9 @@ from aiogram.fsm.context import FSMContext
 
 from app.states import Newsletter
 from app.db.requests import get_users
+from app.db.summary_cache import cache_stats
+from app.render import render_cache
+from app.summary import warm_up
 
 admin = Router()
 
@@ -34,3 +37,32 @@ async def newsletter_message(message: Message, state: FSMContext):
         except Exception as e:
             print(e)
     await message.answer('Рассылка завершена')
+
+# Предзагрузка таблиц summary.php: /warmup 34123 27612 [месяцев]
+@admin.message(Admin(), Command('warmup'))
+async def warmup_summary(message: Message):
+    args = message.text.split()[1:]
+    months = int(args.pop()) if len(args) > 1 and len(args[-1]) <= 3 and args[-1].isdigit() else 12
+    station_ids = [arg for arg in args if arg.isdigit()]
+    if not station_ids:
+        await message.answer('Формат: /warmup <код_станции> ... [месяцев]')
+        return
+
+    await message.answer(f'Загрузка {len(station_ids)} станций за {months} мес. началась.')
+    loaded, total = await warm_up(station_ids, months)
+    stats = await cache_stats()
+    await message.answer(
+        f'Загружено таблиц: {loaded}/{total}\n'
+        f'В кэше: {stats["months"]} мес. ({stats["complete"]} завершённых), '
+        f'{stats["bytes"] / 1024 / 1024:.1f} МБ')
+
+# Состояние кэшей: таблицы summary.php в SQLite и готовые тексты сообщений
+@admin.message(Admin(), Command('stats'))
+async def cache_statistics(message: Message):
+    stats = await cache_stats()
+    texts = render_cache.stats()
+    await message.answer(
+        f'Таблицы summary.php: {stats["months"]} мес. ({stats["complete"]} завершённых), '
+        f'{stats["bytes"] / 1024 / 1024:.1f} МБ\n'
+        f'Готовые тексты: {texts["texts"]} шт., {texts["bytes"] / 1024 / 1024:.1f} МБ, '
+        f'попаданий {texts["hits"]}, промахов {texts["misses"]} ({texts["hit_rate"]:.0%})')
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import asyncio
+import logging
+
+from datetime import date, datetime
+from functools import lru_cache
+
+import numpy as np
+
+from app.pik import pik_session
+from app.summary import (SummaryRow, SUMMARY_URL, PHENOMENA, parse_summary_table, months_between,
+                         is_complete_month)
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = 'other/archive'
+# Числовые столбцы архива; явления хранятся как признак "наблюдалось в этот день"
+ARCHIVE_FIELDS = (
+    'temp_avg', 'temp_anomaly', 'temp_min', 'temp_max', 'humidity', 'humidity_min',
+    'wind', 'wind_gust', 'pressure_avg', 'pressure_min', 'pressure_max',
+    'precip_night', 'precip_day', 'precip_total', 'snow_cover',
+)
+
+
+# Не более rate запросов в секунду: каждый следующий запрос ждёт своего слота
+class RateLimiter:
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def spool_path(station_id, directory=ARCHIVE_DIR):
+    return os.path.join(directory, f"{station_id}.jsonl")
+
+def archive_path(station_id, directory=ARCHIVE_DIR):
+    return os.path.join(directory, f"{station_id}.npz")
+
+# Загруженные месяцы станции. Журнал .jsonl дописывается после каждого законченного
+# месяца с таблицей и служит контрольной точкой: при повторном запуске эти месяцы
+# не загружаются. Записи без таблицы (из прежних версий журнала) пропускаются,
+# такие месяцы загружаются заново
+def read_spool(station_id, directory=ARCHIVE_DIR):
+    months = {}
+    path = spool_path(station_id, directory)
+    if not os.path.exists(path):
+        return months
+    with open(path, 'rb+') as f:
+        valid = 0
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            if not line.endswith(b'\n'):
+                break
+            valid += len(line)
+            if record['rows'] is not None:
+                months[(record['year'], record['month'])] = [
+                    SummaryRow(day, tuple(cells)) for day, cells in record['rows']]
+        # Строка, оборванная при аварийной остановке, отбрасывается
+        f.truncate(valid)
+    return months
+
+def append_spool(station_id, year, month, rows, directory=ARCHIVE_DIR):
+    record = {
+        'year': year,
+        'month': month,
+        'rows': [[row.date, list(row.cells)] for row in rows],
+    }
+    with open(spool_path(station_id, directory), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+# Столбцовый архив станции: даты, числовые поля (NaN - нет данных), признаки явлений
+# и список загруженных месяцев (год * 12 + месяц - 1). Месяц без таблицы (None)
+# и ещё не окончательный месяц загруженными не считаются
+def write_archive(station_id, months, directory=ARCHIVE_DIR):
+    dated = []
+    for month_rows in months.values():
+        for row in month_rows or []:
+            try:
+                dated.append((datetime.strptime(row.date, "%d.%m.%Y").date(), row))
+            except ValueError:
+                continue
+    dated.sort(key=lambda item: item[0])
+    rows = [row for _, row in dated]
+
+    columns = {
+        'date': np.array([day for day, _ in dated], dtype='datetime64[D]'),
+        'months': np.array(sorted(year * 12 + month - 1 for (year, month), month_rows in months.items()
+                                  if month_rows is not None and is_complete_month(year, month)),
+                           dtype=np.int32),
+        'station_name': np.array(rows[0].text('station_name') if rows else ''),
+    }
+    for field in ARCHIVE_FIELDS:
+        columns[field] = np.array(
+            [np.nan if row.number(field) is None else row.number(field) for row in rows],
+            dtype=np.float64)
+    for field in PHENOMENA:
+        columns[field] = np.array([bool(row.text(field)) for row in rows], dtype=bool)
+
+    path = archive_path(station_id, directory)
+    tmp_path = path + '.tmp.npz'
+    np.savez_compressed(tmp_path, **columns)
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+async def _fetch_page(station_id, year, month, html_dir, limiter):
+    if html_dir:
+        # Офлайн-режим: сохранённые страницы {станция}_{год}_{месяц:02}.html
+        path = os.path.join(html_dir, f"{station_id}_{year}_{month:02d}.html")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    await limiter.wait()
+    return await pik_session.fetch(SUMMARY_URL.format(month=month, year=year, station_id=station_id))
+
+# Загрузка всех месяцев периода по станциям. Уже загруженные месяцы пропускаются,
+# после каждой станции пересобирается её .npz
+async def ingest(station_ids, start: date, end: date, directory=ARCHIVE_DIR, html_dir=None,
+                 rate: float = 1.0, concurrency: int = 4):
+    os.makedirs(directory, exist_ok=True)
+    limiter = RateLimiter(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+    totals = {'fetched': 0, 'skipped': 0, 'missing': 0, 'failed': 0}
+
+    async def load(station_id, months, year, month):
+        async with semaphore:
+            try:
+                html = await _fetch_page(station_id, year, month, html_dir, limiter)
+            except Exception as e:
+                logger.warning(f"{station_id} {month:02d}.{year}: {e}")
+                totals['failed'] += 1
+                return
+        rows = None if html is None else parse_summary_table(html)
+        # В журнал попадают только окончательные месяцы с таблицей; остальные
+        # (текущий, без страницы или без таблицы) загружаются при следующем запуске
+        if rows is not None and is_complete_month(year, month):
+            append_spool(station_id, year, month, rows, directory)
+        months[(year, month)] = rows
+        totals['fetched' if rows is not None else 'missing'] += 1
+
+    for station_id in station_ids:
+        months = read_spool(station_id, directory)
+        period = months_between(start, end)
+        todo = [(year, month) for year, month in period if (year, month) not in months]
+        totals['skipped'] += len(period) - len(todo)
+
+        await asyncio.gather(*(load(station_id, months, year, month) for year, month in todo))
+        count = write_archive(station_id, months, directory)
+        logger.info(f"{station_id}: загружено месяцев {len(todo)}, всего дней в архиве {count}")
+    return totals
+
+
+@lru_cache(maxsize=64)
+def _load_archive(path, mtime_ns):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+# Архив перезаписывается отдельным процессом (ingest.py), поэтому ключ кэша -
+# путь вместе со временем изменения файла
+def load_archive(station_id, directory=ARCHIVE_DIR):
+    path = archive_path(station_id, directory)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _load_archive(path, mtime_ns)
+
+# Статистика за период по архиву в формате aggregate_summary;
+# None, если архив не покрывает все месяцы периода
+def archive_summary(station_id, start: date, end: date, directory=ARCHIVE_DIR):
+    archive = load_archive(station_id, directory)
+    if archive is None:
+        return None
+    wanted = np.array([year * 12 + month - 1 for year, month in months_between(start, end)])
+    if not np.isin(wanted, archive['months']).all():
+        return None
+
+    mask = (archive['date'] >= np.datetime64(start)) & (archive['date'] <= np.datetime64(end))
+    if not mask.any():
+        return None
+    dates = archive['date'][mask]
+
+    def extreme(field, pick):
+        values = archive[field][mask]
+        if np.isnan(values).all():
+            return None, None
+        ix = pick(values)
+        return float(values[ix]), dates[ix].astype(date).strftime("%d.%m.%Y")
+
+    temp_avg = archive['temp_avg'][mask]
+    precip = np.nan_to_num(archive['precip_total'][mask])
+    return {
+        'days': int(mask.sum()),
+        'temp_mean': None if np.isnan(temp_avg).all() else float(np.nanmean(temp_avg)),
+        'temp_max': extreme('temp_max', np.nanargmax),
+        'temp_min': extreme('temp_min', np.nanargmin),
+        'precip_total': float(precip.sum()),
+        'precip_days': int((precip > 0).sum()),
+        'precip_max': (float(precip.max()), dates[precip.argmax()].astype(date).strftime("%d.%m.%Y")),
+        'phenomena': {field: int(archive[field][mask].sum()) for field in PHENOMENA},
+    }
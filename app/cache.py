@@ -0,0 +1,70 @@
+import time
+import asyncio
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+# Асинхронный кэш с TTL и LRU-вытеснением.
+# Одновременные запросы одного ключа объединяются: загрузка выполняется один раз,
+# остальные ждут её результата
+class TTLCache:
+    def __init__(self, ttl: float, max_size: int = 1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key, default=None):
+        item = self._entries.get(key)
+        if item is None:
+            return default
+        expires, value = item
+        if time.monotonic() >= expires:
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float = None):
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(self, key, fetch: Callable[[], Awaitable[Any]]):
+        """Значение из кэша или результат fetch(); None не кэшируется"""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._fetch(key, fetch))
+            self._inflight[key] = task
+        # Отмена одного ожидающего не должна прерывать загрузку для остальных
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key, fetch):
+        try:
+            value = await fetch()
+            if value is not None:
+                self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    @property
+    def hit_rate(self):
+        """Доля запросов, обслуженных без обращения к источнику"""
+        total = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,111 @@
+import csv
+
+from typing import NamedTuple, Optional
+
+from load import normalize_city_name
+from app.fuzzy import TrigramIndex
+from app.db.summary_cache import get_station_names, put_station_name
+
+CATALOG_PATH = 'other/wmo_stations.csv'
+
+
+class WmoStation(NamedTuple):
+    wmo_id: str
+    name: str
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+
+# Функция загрузки справочника станций: синоптический индекс ВМО, название и координаты
+def load_wmo_stations(file_path=CATALOG_PATH):
+    stations = []
+
+    with open(file_path, mode='r', encoding='utf-8', newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        for row in reader:
+            if not row or row[0].startswith('#'):
+                continue
+            stations.append(WmoStation(row[0].strip(), row[1].strip(), float(row[2]), float(row[3])))
+    return stations
+
+# Варианты названия для поиска: полное и без уточнения в скобках ("Москва (ВДНХ)" -> "МОСКВА")
+def station_names(name):
+    names = [normalize_city_name(name)]
+    short = normalize_city_name(name.split('(')[0])
+    if short and short != names[0]:
+        names.append(short)
+    return names
+
+
+# Справочник станций для запросов по названию: точный поиск и нечёткий для подсказок.
+# Пополняется названиями из загруженных таблиц summary.php (без координат)
+class StationCatalog:
+    def __init__(self, stations):
+        self.stations = []
+        self._by_id = {}
+        self._by_name = {}
+        self._fuzzy = TrigramIndex()
+        for station in stations:
+            self.add(station.wmo_id, station.name, station.lat, station.lon)
+
+    def add(self, wmo_id, name, lat=None, lon=None):
+        """Добавление станции; False, если название пустое или станция уже есть"""
+        if not name or wmo_id in self._by_id:
+            return False
+        ix = len(self.stations)
+        self.stations.append(WmoStation(wmo_id, name, lat, lon))
+        self._by_id[wmo_id] = ix
+        for key in station_names(name):
+            if key in self._by_name:
+                # При дубликатах остаётся первая станция
+                continue
+            self._by_name[key] = ix
+            self._fuzzy.add(key, ix)
+        return True
+
+    def by_id(self, wmo_id):
+        ix = self._by_id.get(wmo_id)
+        return None if ix is None else self.stations[ix]
+
+    def get(self, name):
+        """Точный поиск станции по названию"""
+        ix = self._by_name.get(normalize_city_name(name))
+        return None if ix is None else self.stations[ix]
+
+    def search(self, name, limit=5):
+        """Нечёткий поиск: список (расстояние, станция), ближайшие первыми"""
+        return [(distance, self.stations[ix])
+                for distance, ix in self._fuzzy.search_values(normalize_city_name(name), limit)]
+
+    def resolve(self, id_or_name):
+        """Индекс ВМО по индексу или точному названию станции; None, если станция не найдена.
+        Нечёткое совпадение не принимается: в справочнике мало станций, и ближайшее
+        название часто оказывается другим городом (Томск -> Омск), его предлагают через search"""
+        if id_or_name.isdigit():
+            return id_or_name
+        station = self.get(id_or_name)
+        return station.wmo_id if station else None
+
+    def __len__(self):
+        return len(self.stations)
+
+
+_station_catalog = None
+
+# Ленивая загрузка, как и у справочника городов
+def get_station_catalog():
+    global _station_catalog
+    if _station_catalog is None:
+        _station_catalog = StationCatalog(load_wmo_stations())
+    return _station_catalog
+
+# Станция из таблицы summary.php: новое название сохраняется в локальном кэше
+async def learn_station(wmo_id, name):
+    if get_station_catalog().add(wmo_id, name):
+        await put_station_name(wmo_id, name)
+
+# Запуск: названия, узнанные до перезапуска
+async def load_learned_stations():
+    catalog = get_station_catalog()
+    for wmo_id, name in await get_station_names():
+        catalog.add(wmo_id, name)
+    return len(catalog)
@@ -0,0 +1,58 @@
+import aiohttp
+
+# Таймауты по умолчанию для каждого источника данных, секунды
+PROVIDER_TIMEOUTS = {
+    'weatherapi': aiohttp.ClientTimeout(total=10, connect=5),   # api.weatherapi.com
+    'gmc': aiohttp.ClientTimeout(total=30, connect=10),         # метеограммы ГМЦ
+    'pws': aiohttp.ClientTimeout(total=10, connect=5),          # api.weather.com (АМС)
+    'pik': aiohttp.ClientTimeout(total=20, connect=10),         # pogodaiklimat.ru
+}
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=5)
+
+
+# Общий HTTP-клиент приложения: один пул соединений с keep-alive и кэшем DNS.
+# Создаётся при запуске диспетчера и закрывается при остановке
+class HttpClient:
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: int = 30,
+        timeouts: dict = None
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeouts = {**PROVIDER_TIMEOUTS, **(timeouts or {})}
+        self._session = None
+
+    async def start(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=DEFAULT_TIMEOUT)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            raise RuntimeError("HTTP-клиент не запущен")
+        return self._session
+
+    def get(self, url, provider=None, **kwargs):
+        kwargs.setdefault('timeout', self.timeouts.get(provider, DEFAULT_TIMEOUT))
+        return self.session.get(url, **kwargs)
+
+    def post(self, url, provider=None, **kwargs):
+        kwargs.setdefault('timeout', self.timeouts.get(provider, DEFAULT_TIMEOUT))
+        return self.session.post(url, **kwargs)
@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, DateTime
+from sqlalchemy import BigInteger, DateTime, select, delete, func, inspect
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
 from sqlalchemy.ext.asyncio import AsyncAttrs, async_sessionmaker, create_async_engine
 
@@ -16,7 +16,8 @@ class User(Base):
     __tablename__ = 'users'
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    tg_id = mapped_column(BigInteger)
+    # Уникальный индекс: поиск и вставка пользователя без полного просмотра таблицы
+    tg_id = mapped_column(BigInteger, unique=True, index=True)
 
 # Таблица заблокированных пользователей
 class BannedUser(Base):
@@ -28,3 +29,14 @@ class BannedUser(Base):
 async def async_main():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_user_index)
+
+# Таблица users, созданная до появления индекса: дубликаты tg_id удаляются
+# (остаётся первая запись), затем создаётся уникальный индекс
+def create_user_index(conn):
+    for index in User.__table__.indexes:
+        if index.name in {ix['name'] for ix in inspect(conn).get_indexes('users')}:
+            continue
+        first_ids = select(func.min(User.id)).group_by(User.tg_id).subquery()
+        conn.execute(delete(User).where(User.id.not_in(select(first_ids))))
+        index.create(conn)
@@ -1,7 +1,13 @@
+from collections import OrderedDict
+
 from sqlalchemy import select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from app.db.models import User
 from app.db.models import async_session
 
+# Сколько последних зарегистрированных tg_id помнить в памяти
+KNOWN_USERS_SIZE = 100_000
+
 # Функция подключения к базе данных
 def connection(func):
     async def inner(*args, **kwargs):
@@ -10,14 +16,56 @@ def connection(func):
 
     return inner
 
-# Добавление пользователя в базу данных
-@connection
-async def set_user(session, tg_id):
-    user = await session.scalar(select(User).where(User.tg_id == tg_id))
+# Уже зарегистрированные пользователи: повторный /start не обращается к базе.
+# Ограниченный LRU - при переполнении забываются давно не заходившие
+class KnownUsers:
+    def __init__(self, maxsize: int = KNOWN_USERS_SIZE):
+        self.maxsize = maxsize
+        self._ids = OrderedDict()
+
+    def __contains__(self, tg_id):
+        if tg_id not in self._ids:
+            return False
+        self._ids.move_to_end(tg_id)
+        return True
+
+    def add(self, tg_id):
+        self._ids[tg_id] = None
+        self._ids.move_to_end(tg_id)
+        if len(self._ids) > self.maxsize:
+            self._ids.popitem(last=False)
+
+    def __len__(self):
+        return len(self._ids)
 
-    if not user:
+
+known_users = KnownUsers()
+
+# INSERT, который не падает, если пользователь уже есть (уникальный индекс на tg_id)
+def insert_user_ignore(dialect, tg_id):
+    if dialect == 'postgresql':
+        return postgresql.insert(User).values(tg_id=tg_id).on_conflict_do_nothing(index_elements=[User.tg_id])
+    if dialect == 'sqlite':
+        return sqlite.insert(User).values(tg_id=tg_id).on_conflict_do_nothing(index_elements=[User.tg_id])
+    if dialect in ('mysql', 'mariadb'):
+        return mysql.insert(User).values(tg_id=tg_id).prefix_with('IGNORE')
+    return None
+
+@connection
+async def _insert_user(session, tg_id):
+    stmt = insert_user_ignore(session.bind.dialect.name, tg_id)
+    if stmt is not None:
+        await session.execute(stmt)
+    elif not await session.scalar(select(User.id).where(User.tg_id == tg_id)):
         session.add(User(tg_id=tg_id))
-        await session.commit()
+    await session.commit()
+
+# Добавление пользователя в базу данных
+async def set_user(tg_id):
+    if tg_id in known_users:
+        return
+    await _insert_user(tg_id)
+    known_users.add(tg_id)
 
 @connection
 async def get_users(session):
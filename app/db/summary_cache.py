@@ -0,0 +1,111 @@
+import json
+import time
+
+from sqlalchemy import String, Integer, Float, Boolean, Text, select, delete, func, cast
+from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
+from sqlalchemy.ext.asyncio import AsyncAttrs, async_sessionmaker, create_async_engine
+
+# Локальный кэш таблиц summary.php, отдельно от основной базы пользователей
+SUMMARY_CACHE_URL = 'sqlite+aiosqlite:///other/summary_cache.db'
+# Срок хранения таблицы текущего месяца, секунды; прошедшие месяцы хранятся бессрочно
+CURRENT_MONTH_TTL = 1800
+# Ограничения размера кэша: при превышении вытесняются давно запрошенные месяцы
+MAX_CACHED_MONTHS = 20000
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+engine = create_async_engine(url=SUMMARY_CACHE_URL)
+
+async_session = async_sessionmaker(engine)
+
+
+class Base(AsyncAttrs, DeclarativeBase):
+    pass
+
+# Таблица за месяц по станции: строки хранятся в JSON одним значением
+class SummaryMonth(Base):
+    __tablename__ = 'summary_months'
+
+    station_id: Mapped[str] = mapped_column(String(16), primary_key=True)
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    month: Mapped[int] = mapped_column(Integer, primary_key=True)
+    complete: Mapped[bool] = mapped_column(Boolean)
+    fetched_at: Mapped[float] = mapped_column(Float)
+    accessed_at: Mapped[float] = mapped_column(Float, index=True)
+    size: Mapped[int] = mapped_column(Integer)
+    rows: Mapped[str] = mapped_column(Text)
+
+# Названия станций из загруженных таблиц: пополняют справочник станций после перезапуска
+class StationName(Base):
+    __tablename__ = 'station_names'
+
+    station_id: Mapped[str] = mapped_column(String(16), primary_key=True)
+    name: Mapped[str] = mapped_column(String(128))
+
+# Запуск
+async def init_summary_cache():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+# Строки месяца в виде пар [дата, [ячейки]]; None, если месяца нет в кэше
+# или таблица текущего месяца устарела (stale=True - устаревшая тоже подходит)
+async def get_month(station_id, year, month, stale=False):
+    async with async_session() as session:
+        cached = await session.get(SummaryMonth, (station_id, year, month))
+        if cached is None:
+            return None
+        if not stale and not cached.complete and time.time() - cached.fetched_at > CURRENT_MONTH_TTL:
+            return None
+
+        cached.accessed_at = time.time()
+        rows = json.loads(cached.rows)
+        await session.commit()
+        return rows
+
+async def put_month(station_id, year, month, rows, complete):
+    data = json.dumps([[row.date, list(row.cells)] for row in rows], ensure_ascii=False)
+    now = time.time()
+    async with async_session() as session:
+        await session.merge(SummaryMonth(
+            station_id=station_id, year=year, month=month, complete=complete,
+            fetched_at=now, accessed_at=now, size=len(data.encode('utf-8')), rows=data
+        ))
+        await session.commit()
+        await _evict(session)
+
+async def _evict(session):
+    count, size = (await session.execute(
+        select(func.count(), func.coalesce(func.sum(SummaryMonth.size), 0)))).one()
+    if count <= MAX_CACHED_MONTHS and size <= MAX_CACHE_BYTES:
+        return
+
+    # Самые давно запрошенные месяцы удаляются, пока кэш не уложится в лимиты
+    oldest = (await session.execute(
+        select(SummaryMonth.station_id, SummaryMonth.year, SummaryMonth.month, SummaryMonth.size)
+        .order_by(SummaryMonth.accessed_at))).all()
+    for station_id, year, month, month_size in oldest:
+        if count <= MAX_CACHED_MONTHS and size <= MAX_CACHE_BYTES:
+            break
+        await session.execute(delete(SummaryMonth).where(
+            SummaryMonth.station_id == station_id,
+            SummaryMonth.year == year,
+            SummaryMonth.month == month))
+        count -= 1
+        size -= month_size
+    await session.commit()
+
+async def cache_stats():
+    async with async_session() as session:
+        count, size, complete = (await session.execute(
+            select(func.count(), func.coalesce(func.sum(SummaryMonth.size), 0),
+                   func.coalesce(func.sum(cast(SummaryMonth.complete, Integer)), 0)))).one()
+    return {'months': count, 'bytes': size, 'complete': complete}
+
+async def put_station_name(station_id, name):
+    async with async_session() as session:
+        await session.merge(StationName(station_id=station_id, name=name))
+        await session.commit()
+
+async def get_station_names():
+    async with async_session() as session:
+        return (await session.execute(select(StationName.station_id, StationName.name))).all()
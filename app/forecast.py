@@ -0,0 +1,105 @@
+import os
+import math
+import time
+
+from dataclasses import dataclass
+from functools import cached_property
+from dotenv import load_dotenv
+
+from app.cache import TTLCache
+from app.client import HttpClient
+from app.health import provider_health
+from app.hourly import HourlyTable
+
+load_dotenv('other/.env')
+
+WEATHER_TOKEN = os.getenv('WEATHER_TOKEN')
+FORECAST_URL = "http://api.weatherapi.com/v1/forecast.json"
+# Максимальный горизонт прогноза: запрашивается всегда, более короткие прогнозы
+# и текущая погода вырезаются из сохранённого ответа
+MAX_FORECAST_DAYS = 3
+
+# Ответ forecast.json и сведения о его происхождении
+@dataclass
+class Forecast:
+    data: dict
+    query: str
+    fetched_at: float
+    source: str = "weatherapi.com forecast.json"
+
+    @property
+    def age(self):
+        """Возраст данных в секундах"""
+        return time.time() - self.fetched_at
+
+    @property
+    def location(self):
+        return self.data['location']
+
+    @property
+    def current(self):
+        return self.data['current']
+
+    @cached_property
+    def hourly(self) -> HourlyTable:
+        """Почасовой прогноз в столбцах, разбирается при первом обращении"""
+        return HourlyTable(self.data['forecast']['forecastday'])
+
+    @cached_property
+    def periods(self) -> dict:
+        """Сводка по временам суток для всех дней прогноза"""
+        return self.hourly.digest()
+
+    def render_key(self, view: str):
+        """Ключ кэша готовых текстов: источник, место, версия данных и вид сообщения"""
+        return (self.source, normalize_location(self.query), self.fetched_at, view)
+
+    def days(self, count: int) -> dict:
+        """Ответ в формате forecast.json, обрезанный до count дней"""
+        return {
+            **self.data,
+            'forecast': {'forecastday': self.data['forecast']['forecastday'][:count]}
+        }
+
+
+# Прогнозы weatherapi.com по населённому пункту
+forecast_cache = TTLCache(ttl=600, max_size=2048)
+# Прогнозы по геолокации: координаты привязываются к ячейке сетки GRID_STEP градусов
+# (0.05° - около 5 км по широте), пользователи в одной ячейке получают общий ответ
+GRID_STEP = 0.05
+spatial_cache = TTLCache(ttl=300, max_size=4096)
+
+def normalize_location(location: str) -> str:
+    return ' '.join(location.split()).lower()
+
+# Центр ячейки сетки, в которую попадает точка
+def snap_to_grid(lat: float, lon: float, step: float = GRID_STEP):
+    return (
+        round((math.floor(lat / step) + 0.5) * step, 4),
+        round((math.floor(lon / step) + 0.5) * step, 4)
+    )
+
+async def fetch_forecast(http: HttpClient, query: str):
+    provider_health.ensure('weatherapi')
+    params = {
+        'key': WEATHER_TOKEN,
+        'q': query,
+        'days': MAX_FORECAST_DAYS,
+        'lang': 'ru'
+    }
+    async with http.get(FORECAST_URL, 'weatherapi', params=params) as response:
+        if response.status != 200:
+            return None
+        return Forecast(data=await response.json(), query=query, fetched_at=time.time())
+
+# Прогноз на MAX_FORECAST_DAYS дней; None, если населённый пункт не найден.
+# Одновременные запросы одного города выполняются одним обращением к API
+async def get_forecast(http: HttpClient, location: str):
+    return await forecast_cache.get_or_fetch(
+        normalize_location(location), lambda: fetch_forecast(http, location))
+
+# Прогноз по координатам, общий для всех точек одной ячейки сетки
+async def get_forecast_by_coords(http: HttpClient, lat: float, lon: float):
+    cell = snap_to_grid(lat, lon)
+    return await spatial_cache.get_or_fetch(
+        cell, lambda: fetch_forecast(http, f"{cell[0]},{cell[1]}"))
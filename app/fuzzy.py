@@ -0,0 +1,130 @@
+from collections import Counter, defaultdict
+
+# Латиница -> кириллица (сначала длинные сочетания)
+TRANSLIT = [
+    ('SHCH', 'Щ'), ('SCH', 'Щ'),
+    ('ZH', 'Ж'), ('KH', 'Х'), ('TS', 'Ц'), ('CH', 'Ч'), ('SH', 'Ш'),
+    ('YA', 'Я'), ('JA', 'Я'), ('YU', 'Ю'), ('JU', 'Ю'), ('YO', 'Е'), ('JO', 'Е'),
+    ('A', 'А'), ('B', 'Б'), ('V', 'В'), ('W', 'В'), ('G', 'Г'), ('D', 'Д'),
+    ('E', 'Е'), ('Z', 'З'), ('I', 'И'), ('J', 'Й'), ('Y', 'Ы'), ('K', 'К'),
+    ('L', 'Л'), ('M', 'М'), ('N', 'Н'), ('O', 'О'), ('P', 'П'), ('R', 'Р'),
+    ('S', 'С'), ('T', 'Т'), ('U', 'У'), ('F', 'Ф'), ('H', 'Х'), ('C', 'Ц'),
+    ('X', 'КС'), ('Q', 'К'), ("'", 'Ь'),
+]
+
+def has_latin(text):
+    return any('A' <= char <= 'Z' for char in text.upper())
+
+def transliterate(text):
+    """Перевод латиницы в кириллицу (MOSKVA -> МОСКВА)"""
+    text = text.upper()
+    result = []
+    i = 0
+    while i < len(text):
+        for latin, cyrillic in TRANSLIT:
+            if text.startswith(latin, i):
+                result.append(cyrillic)
+                i += len(latin)
+                break
+        else:
+            result.append(text[i])
+            i += 1
+    return ''.join(result)
+
+def trigrams(text):
+    text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def levenshtein(a, b, limit=None):
+    """Расстояние редактирования; при превышении limit возвращает limit + 1"""
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is None:
+        limit = len(a)
+    if len(a) - len(b) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        left = i
+        for j, char_b in enumerate(b):
+            value = previous[j] if char_a == char_b else previous[j] + 1
+            up = previous[j + 1] + 1
+            if up < value:
+                value = up
+            if left + 1 < value:
+                value = left + 1
+            current.append(value)
+            left = value
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+# Триграммный инвертированный индекс с доранжированием по расстоянию Левенштейна
+class TrigramIndex:
+    def __init__(self, candidates=12):
+        self.candidates = candidates
+        self._keys = []
+        self._values = []
+        self._postings = defaultdict(list)
+
+    @classmethod
+    def from_tables(cls, keys, values, postings, candidates=12):
+        """Готовый индекс: последовательности ключей и значений и отображение
+        триграмма -> номера ключей (например, из снимка в памяти)"""
+        index = cls(candidates)
+        index._keys = keys
+        index._values = values
+        index._postings = postings
+        return index
+
+    def add(self, key, value):
+        ix = len(self._keys)
+        self._keys.append(key)
+        self._values.append(value)
+        for gram in trigrams(key):
+            self._postings[gram].append(ix)
+
+    def search(self, query, limit=5):
+        """Список (расстояние, ключ, значение), отсортированный по расстоянию"""
+        scores = Counter()
+        for gram in trigrams(query):
+            scores.update(self._postings.get(gram, ()))
+
+        ranked = []
+        limit_distance = len(query)
+        for ix, _ in scores.most_common(self.candidates):
+            key = self._keys[ix]
+            distance = levenshtein(query, key, limit_distance)
+            if distance > limit_distance:
+                continue
+            ranked.append((distance, key, ix))
+            # Кандидаты дальше текущего limit-го места не нужны
+            if len(ranked) >= limit:
+                ranked.sort()
+                limit_distance = ranked[limit - 1][0]
+        ranked.sort()
+        return [(distance, key, self._values[ix]) for distance, key, ix in ranked[:limit]]
+
+    def search_values(self, query, limit=5):
+        """Список (расстояние, значение) без повторов значения: одна запись
+        может попасть в выдачу под несколькими ключами"""
+        found = []
+        seen = set()
+        for distance, _, value in self.search(query, limit * 2):
+            if value not in seen:
+                seen.add(value)
+                found.append((distance, value))
+        return found[:limit]
+
+    def closest(self, query):
+        """Ближайшее значение в пределах допустимого числа опечаток (четверть длины) или None"""
+        results = self.search_values(query, limit=1)
+        if results and results[0][0] <= max(1, len(query) // 4):
+            return results[0][1]
+        return None
+
+    def __len__(self):
+        return len(self._keys)
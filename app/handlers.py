@@ -2,35 +2,36 @@ from aiogram import Router, F
 from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import Message, CallbackQuery, FSInputFile
+from aiogram.types import Message, CallbackQuery, BufferedInputFile, InputMediaPhoto
 
-import os
 import re
 import time
-import aiohttp
-import requests
 
-from bs4 import BeautifulSoup
 from datetime import datetime
-from dotenv import load_dotenv
 from typing import Optional, Dict
 
-from load import city_data
+from load import get_city_registry, url_city_name
 import app.keyboards as kb
 from app.db.requests import set_user
+from app.client import HttpClient
+from app.forecast import get_forecast, get_forecast_by_coords
+from app.hourly import PERIOD_NAMES, PERIOD_ORDER
+from app.meteogram import fetch_meteograms, send_album, remember_file_ids
+from app.prefetch import MeteogramPrefetcher
+from app.render import render_cache
+from app.health import ProviderUnavailable
+from app.pik import PikAuthError
+from app.pws import fetch_observation, PwsUnavailable
+from app.risk import RISK_LEVELS, get_risk_level
+from app.stations import get_station_registry, observation_store
+from app.archive import archive_summary
+from app.catalog import get_station_catalog
+from app.summary import (fetch_summary_month, fetch_summary_range, find_day, aggregate_summary,
+                         months_between, PHENOMENA, MAX_RANGE_MONTHS)
 
 
-# Загрузка переменных из .env файла
-load_dotenv('other/.env')
-
-# Получение токена
-WEATHER_TOKEN = os.getenv('WEATHER_TOKEN')
 router = Router()
 
-LOGIN = os.getenv('PIK_LOGIN')
-PASSWORD = os.getenv('PIK_PASSWORD')
-LOGIN_URL = "http://www.pogodaiklimat.ru/login.php"
-
 # Класс состояний
 class RequestWeather(StatesGroup):
     location_user = State()
@@ -77,68 +78,6 @@ async def get_forecast_loc(message: Message, state: FSMContext):
     await message.answer(f"Вы можете поделиться местоположением для быстрого определения погоды",
                          reply_markup=kb.share_location)
     
-def login_pik():
-    session = requests.Session()
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 ' 
-                      '(KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'
-    }
-
-    resp = session.get(LOGIN_URL, headers=headers)
-    resp.encoding = 'utf-8'
-    soup = BeautifulSoup(resp.text, 'html.parser')
-
-    hidden_inputs = soup.find_all("input", type="hidden")
-    data = {inp['name']: inp.get('value', '') for inp in hidden_inputs}
-
-    data.update({
-        'username': LOGIN,
-        'password': PASSWORD,
-        'submit': 'Войти',
-    })
-
-    login_response = session.post(LOGIN_URL, data=data, headers=headers)
-    login_response.encoding = 'utf-8'
-
-    if "Выход" in login_response.text or "logout" in login_response.text.lower():
-        print("Успешно авторизовались на сайте.")
-        return session
-    else:
-        print("Не удалось авторизоваться. Проверь логин и пароль.")
-        return None
-
-API_KEYS = {
-    "армавир": os.getenv("ARMAVIR_API_KEY"),
-    "похвистнево": os.getenv("POHVISTNEVO_API_KEY")
-}
-
-STATION_IDS = {
-    "армавир": "IARMAV7",
-    "похвистнево": "IPOKHV1"
-}
-
-CITY_NAMES = {
-    "армавир": "Армавире",
-    "похвистнево": "Похвистнево"
-}
-
-def check_api_keys():
-    print("Проверка API ключей и stationId...")
-    for city in API_KEYS:
-        api_key = API_KEYS[city]
-        station_id = STATION_IDS[city]
-        url = f"https://api.weather.com/v2/pws/observations/current?stationId={station_id}&format=json&units=m&apiKey={api_key}"
-        try:
-            response = requests.get(url, timeout=10)
-            if response.status_code != 200:
-                print(f"❌ Проверка не пройдена для '{city}': статус {response.status_code} - {response.text}")
-            elif not response.content:
-                print(f"❌ Проверка не пройдена для '{city}': пустой ответ.")
-            else:
-                print(f"✅ Проверка успешна для '{city}'.")
-        except Exception as e:
-            print(f"❌ Ошибка при проверке '{city}': {e}")
-
 def safe_get(data, path, default="н/д"):
     try:
         for key in path:
@@ -147,95 +86,32 @@ def safe_get(data, path, default="н/д"):
     except (KeyError, TypeError):
         return default
 
-def get_risk_level(temperature, wind_speed_ms, wind_gust_ms, uv_index, pressure, humidity, dew_point):
-    levels = []
-
-    # Температура
-    if temperature >= 45 or temperature <= -45:
-        levels.append(5)
-    elif temperature >= 40 or temperature <= -35:
-        levels.append(4)
-    elif temperature >= 35 or temperature <= -25:
-        levels.append(3)
-    elif temperature >= 30 or temperature <= -15:
-        levels.append(2)
-    else:
-        levels.append(1)
-
-    # Скорость ветра (постоянная)
-    if wind_speed_ms >= 25:
-        levels.append(5)
-    elif wind_speed_ms >= 20:
-        levels.append(4)
-    elif wind_speed_ms >= 15:
-        levels.append(3)
-    elif wind_speed_ms >= 7:
-        levels.append(2)
-    else:
-        levels.append(1)
-
-    # Порывы ветра
-    if wind_gust_ms >= 33:
-        levels.append(5)
-    elif wind_gust_ms >= 25:
-        levels.append(4)
-    elif wind_gust_ms >= 20:
-        levels.append(3)
-    elif wind_gust_ms >= 10:
-        levels.append(2)
-    else:
-        levels.append(1)
-
-    # УФ-индекс
-    if uv_index >= 11:
-        levels.append(5)
-    elif uv_index >= 9:
-        levels.append(4)
-    elif uv_index >= 7:
-        levels.append(3)
-    elif uv_index >= 3:
-        levels.append(2)
-    else:
-        levels.append(1)
-
-    # Давление
-    if pressure <= 950 or pressure >= 1080:
-        levels.append(5)
-    elif pressure <= 970 or pressure >= 1060:
-        levels.append(4)
-    elif pressure <= 980 or pressure >= 1040:
-        levels.append(3)
-    elif pressure <= 990 or pressure >= 1020:
-        levels.append(2)
-    else:
-        levels.append(1)
-
-    # Влажность — всегда 1 (удалены уровни опасности)
-    levels.append(1)
-
-    # Точка росы (высокая - опасность)
-    if dew_point >= 25:
-        levels.append(5)
-    elif dew_point >= 20:
-        levels.append(4)
-    elif dew_point >= 16:
-        levels.append(3)
-    elif dew_point >= 12:
-        levels.append(2)
-    else:
-        levels.append(1)
-
-    max_level = max(levels)
-
-    level_map = {
-        1: "🟢 Дискомфорт отсутвует",
-        2: "🟡 Лёгкий дискомфорт",
-        3: "🟠 Повышенный дискомфорт",
-        4: "🔴 Дискомфорт высокой опасности",
-        5: "🟣 Дискомфорт экстремальной опасности"
-    }
-
-    return level_map[max_level]
+# Наблюдение старше этого срока (секунды) запрашивается у станции заново
+OBSERVATION_MAX_AGE = 1800
+
+def format_age(seconds):
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return "только что"
+    if minutes < 60:
+        return f"{minutes} мин назад"
+    return f"{minutes // 60} ч {minutes % 60} мин назад"
+
+# Строки отчёта по истории наблюдений станции; пусто, пока история не накопилась
+def format_history(series):
+    if series is None:
+        return ""
+    lines = []
+    tendency = series.tendency('pressure', 3 * 3600)
+    if tendency is not None:
+        lines.append(f"📊 Тенденция давления за 3 ч: {tendency:+.1f} гПа")
+    gust = series.max('gust', 3600)
+    if gust is not None:
+        lines.append(f"💨 Макс. порыв за 1 ч: {gust:.1f} м/с")
+    temp_range = series.min_max('temp', 24 * 3600)
+    if temp_range is not None and series.count > 1:
+        lines.append(f"🌡 За 24 ч: мин. {temp_range[0]:.1f}°C, макс. {temp_range[1]:.1f}°C")
+    return "".join(line + "\n" for line in lines)
 
 def get_wind_direction(degree):
     dirs = ['С', 'ССВ', 'СВ', 'ВСВ', 'В', 'ВЮВ', 'ЮВ', 'ЮЮВ', 'Ю', 'ЮЮЗ', 'ЮЗ', 'ЗЮЗ', 'З', 'ЗСЗ', 'СЗ', 'ССЗ']
@@ -250,13 +126,14 @@ async def get_meteostation_data(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 @router.message(RequestWeather.weather_ams)
-async def set_meteostation_data(message: Message, state: FSMContext):
+async def set_meteostation_data(message: Message, state: FSMContext, http: HttpClient):
     await state.update_data(weather_ams=message.text)
     tg_data = await state.get_data()
-    city_key = tg_data['weather_ams'].lower()
+    city_key = tg_data['weather_ams'].strip().lower()
     
     try:
-        if city_key not in API_KEYS:
+        station = get_station_registry().get(city_key)
+        if station is None:
             print(f"Ошибка: город '{city_key}' не найден в конфигурации.")
             await message.answer(f"Данной АМС ({city_key.capitalize()}) нету в нашей базе.\n"
                                 "Если вы хотите её добавить, свяжитесь с нами:\n"
@@ -265,24 +142,36 @@ async def set_meteostation_data(message: Message, state: FSMContext):
                                 "Telegram: 📲 t.me/meteovrn\n"
                                 "ВКонтакте: 🌐 vk.com/meteoexplorer"
                                 )
-
-        api_key = API_KEYS[city_key]
-        station_id = STATION_IDS[city_key]
-        url = f"https://api.weather.com/v2/pws/observations/current?stationId={station_id}&format=json&units=m&apiKey={api_key}"
-
-        try:
-            response = requests.get(url, timeout=10)
-        except Exception as e:
-            print(f"Ошибка запроса к API: {e}")
-            return "⚠️ Не удалось связаться с сервером погоды."
-
-        if response.status_code != 200 or not response.content:
-            print(f"Ошибка API: {response.status_code} - {response.text}")
-            return "⚠️ Не удалось получить данные о погоде."
+            await message.answer("Выберите опцию:", reply_markup=kb.inline_menu)
+            await state.clear()
+            return
+
+        # Ответ из памяти (станции опрашивает StationPoller); к api.weather.com обращаемся,
+        # только если наблюдения ещё нет или опрос давно не удавался
+        # Если сервер недоступен, показывается последнее сохранённое наблюдение, даже устаревшее
+        observation = observation_store.get(station.station_id)
+        error = "⚠️ Не удалось получить данные о погоде."
+        if observation is None or observation.age > OBSERVATION_MAX_AGE:
+            try:
+                data = await fetch_observation(http, station.station_id, station.api_key)
+            except ProviderUnavailable as e:
+                print(f"Ошибка запроса к API: {e.detail}")
+                error, data = str(e), None
+            except PwsUnavailable as e:
+                print(f"Ошибка запроса к API: {e}")
+                data = None
+            if data is not None:
+                observation = observation_store.put(station.station_id, data)
+
+        if observation is None:
+            await message.answer(error)
+            await message.answer("Выберите опцию:", reply_markup=kb.inline_menu)
+            await state.clear()
+            return
+
+        obs = observation.data
 
         try:
-            data = response.json()
-            obs = data['observations'][0]
             temperature = round(float(safe_get(obs, ['metric', 'temp'], 0)))
             humidity = round(float(safe_get(obs, ['humidity'], 0)))
             dewpt = round(float(safe_get(obs, ['metric', 'dewpt'], 0)))
@@ -305,8 +194,8 @@ async def set_meteostation_data(message: Message, state: FSMContext):
 
             result = (
                 f"━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-                f"🌍 Погода в {CITY_NAMES[city_key]}\n"
-                f"🕑 Дата и время: {obs_time}\n"
+                f"🌍 Погода в {station.city_name}\n"
+                f"🕑 Дата и время: {obs_time} ({format_age(observation.age)})\n"
                 f"📡 Источник: АМС (автоматическая метеостанция)\n"
                 f"━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
                 f"\n"
@@ -322,9 +211,10 @@ async def set_meteostation_data(message: Message, state: FSMContext):
                 f"💦 Суммарные осадки: {precip_total} мм\n"
                 f"🌞 УФ-индекс: {uv_index} ☀️\n"
                 f"🔆 Солнечная радиация: {solar_radiation} Вт/м²\n"
+                f"{format_history(observation_store.series(station.station_id))}"
                 f"━━━━━━━━━━━━━━━━━━━━━━━━━━━"
             )
-            print(f"Данные для {CITY_NAMES[city_key]} успешно получены.")
+            print(f"Данные для {station.city_name} успешно получены.")
             await message.answer(result)
 
         except Exception as e:
@@ -360,63 +250,127 @@ def get_weather_icon(condition: str) -> str:
     else:
         return "🌤"
 
-def group_hours_by_period(hours_data):
-    """Группирует почасовой прогноз по временам суток"""
-    periods = {
-        "🌅 Утро": [],
-        "☀ День": [],
-        "🌇 Вечер": [],
-        "🌙 Ночь": []
-    }
-    for hour in hours_data:
-        time_str = hour['time'][-5:]
-        h = int(time_str[:2])
-        entry = f"{get_weather_icon(hour['condition']['text'])} {hour['temp_c']}°C, {hour['condition']['text']}, 💨 {hour['wind_kph']} км/ч, 🌦 {hour['precip_mm']} мм"
-        if 6 <= h < 12:
-            periods["🌅 Утро"].append(entry)
-        elif 12 <= h < 18:
-            periods["☀ День"].append(entry)
-        elif 18 <= h < 24:
-            periods["🌇 Вечер"].append(entry)
-        else:
-            periods["🌙 Ночь"].append(entry)
-    return periods
+def format_periods(forecast, day):
+    """Сводка прогноза дня day по временам суток"""
+    digest = forecast.periods
+    conditions = forecast.hourly.conditions
+    text = ""
+    for period in PERIOD_ORDER:
+        if not digest['count'][day][period]:
+            continue
+        condition = conditions[digest['condition'][day][period]]
+        text += (
+            f"\n\n{PERIOD_NAMES[period]}: {get_weather_icon(condition)} {condition}\n"
+            f"🌡 {digest['temp_min'][day][period]:.1f}…{digest['temp_max'][day][period]:.1f}°C "
+            f"(ср. {digest['temp_mean'][day][period]:.1f}°C), "
+            f"💨 до {digest['wind_max'][day][period]:.1f} км/ч, "
+            f"🌦 {digest['precip'][day][period]:.1f} мм"
+        )
+    return text
+
+# Тексты прогнозов, кэшируются в render_cache
+def render_weather_one_day(cached):
+    data = cached.days(1)
+    location = data["location"]
+    forecast = data["forecast"]["forecastday"][0]
+    day = forecast["day"]
+
+    icon = get_weather_icon(day['condition']['text'])
+    forecast_text = (
+        f"📍 *Местоположение:* {location['name']}, {location['country']}\n"
+        f"📅 *Дата:* {forecast['date']}\n"
+        f"{'─'*30}\n"
+        f"🌡 *Макс:* {day['maxtemp_c']}°C\n"
+        f"🌡❄️ *Мин:* {day['mintemp_c']}°C\n"
+        f"{icon} *Состояние:* {day['condition']['text']}\n"
+        f"💧 *Влажность:* {day['avghumidity']}%\n"
+        f"💨 *Ветер:* {day['maxwind_kph']} км/ч\n"
+        f"🌦 *Осадки:* {day['totalprecip_mm']} мм\n"
+        f"{'─'*30}\n"
+        f"🕒 *Периоды суток:*"
+    )
+
+    forecast_text += format_periods(cached, 0)
+    return forecast_text
+
+def render_weather(cached):
+    data = cached.days(3)
+    location = data["location"]
+    result = f"📍 *Местоположение:* {location['name']}, {location['country']}\nПрогноз на 3 дня:\n"
+
+    for day_index, forecast in enumerate(data["forecast"]["forecastday"]):
+        d = forecast["day"]
+        icon = get_weather_icon(d['condition']['text'])
+
+        result += (
+            f"\n{'─'*30}\n"
+            f"📅 *{forecast['date']}*\n"
+            f"🌡 Макс: {d['maxtemp_c']}°C | Мин: {d['mintemp_c']}°C\n"
+            f"{icon} Состояние: {d['condition']['text']}\n"
+            f"💧 Влажность: {d['avghumidity']}%\n"
+            f"💨 Ветер: {d['maxwind_kph']} км/ч\n"
+            f"🌦 Осадки: {d['totalprecip_mm']} мм\n"
+            f"{'─'*30}\n"
+            f"🕒 *Периоды суток:*"
+        )
+
+        result += format_periods(cached, day_index)
+
+    result += format_worst_period(cached)
+    return result
+
+# Самый опасный период прогноза по таблице порогов app.risk; пусто, если опасности нет
+def format_worst_period(cached):
+    risk = cached.periods['risk']
+    level, day, period = max(
+        (risk[day][period], -day, -PERIOD_ORDER.index(period))
+        for day in range(len(risk)) for period in PERIOD_ORDER
+    )
+    if level < 2:
+        return ""
+    date = cached.data['forecast']['forecastday'][-day]['date']
+    return (
+        f"\n{'─'*30}\n"
+        f"⚠️ *Наиболее опасный период:* {date}, {PERIOD_NAMES[PERIOD_ORDER[-period]]}\n"
+        f"{RISK_LEVELS[level]}"
+    )
 
 # Обработка геолокации пользователя
 @router.message(RequestWeather.location_user, F.location)
-async def get_fast_weather(message: Message, state: FSMContext):
-    async def get_weather_by_coords(lt: float, ln: float, api_key: str) -> Optional[Dict]:
-        base_url = "http://api.weatherapi.com/v1/current.json"
-        params = {
-            'key': api_key,
-            'q': f"{lt},{ln}",
-            'lang': 'ru'
+async def get_fast_weather(message: Message, state: FSMContext, http: HttpClient):
+    async def get_weather_by_coords(lt: float, ln: float) -> Optional[Dict]:
+        # Текущая погода берётся из ответа forecast.json, общего для ближайших точек
+        forecast = await get_forecast_by_coords(http, lt, ln)
+        if not forecast:
+            return None
+        location, current = forecast.location, forecast.current
+        return {
+            'city': location['name'],
+            'region': location['region'],
+            'country': location['country'],
+            'temp': current['temp_c'],
+            'feels_like': current['feelslike_c'],
+            'condition': current['condition']['text'],
+            'humidity': current['humidity'],
+            'wind_kph': current['wind_kph'],
+            'wind_dir': current['wind_dir'],
+            'pressure_mb': current['pressure_mb'],
+            'precip_mm': current['precip_mm'],
+            'cloud': current['cloud'],
+            'last_updated': current['last_updated']
         }
-        async with aiohttp.ClientSession() as session:
-            async with session.get(base_url, params=params) as rp:
-                rp.raise_for_status()
-                data = await rp.json()
-                return {
-                    'city': data['location']['name'],
-                    'region': data['location']['region'],
-                    'country': data['location']['country'],
-                    'temp': data['current']['temp_c'],
-                    'feels_like': data['current']['feelslike_c'],
-                    'condition': data['current']['condition']['text'],
-                    'humidity': data['current']['humidity'],
-                    'wind_kph': data['current']['wind_kph'],
-                    'wind_dir': data['current']['wind_dir'],
-                    'pressure_mb': data['current']['pressure_mb'],
-                    'precip_mm': data['current']['precip_mm'],
-                    'cloud': data['current']['cloud'],
-                    'last_updated': data['current']['last_updated']
-                }
 
     lat, lon = message.location.latitude, message.location.longitude
     await state.update_data(loc=message.location)
 
     try:
-        weather_data = await get_weather_by_coords(lat, lon, WEATHER_TOKEN)
+        weather_data = await get_weather_by_coords(lat, lon)
+    except ProviderUnavailable as e:
+        await message.answer(str(e), reply_markup=kb.inline_menu)
+        await state.clear()
+        return
+
+    try:
         if weather_data:
             icon = get_weather_icon(weather_data['condition'])
             response = (
@@ -454,44 +408,25 @@ async def request_one_day(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 @router.message(RequestWeather.request_weather_one_day)
-async def weather_one_day(message: Message, state: FSMContext):
+async def weather_one_day(message: Message, state: FSMContext, http: HttpClient):
     await state.update_data(request_weather_one_day=message.text)
     tg_data = await state.get_data()
     city_name = tg_data['request_weather_one_day']
-    url = f"http://api.weatherapi.com/v1/forecast.json?key={WEATHER_TOKEN}&q={city_name}&days=1&lang=ru"
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            if response.status == 200:
-                data = await response.json()
-                location = data["location"]
-                forecast = data["forecast"]["forecastday"][0]
-                day = forecast["day"]
-                hours = forecast["hour"]
-
-                icon = get_weather_icon(day['condition']['text'])
-                forecast_text = (
-                    f"📍 *Местоположение:* {location['name']}, {location['country']}\n"
-                    f"📅 *Дата:* {forecast['date']}\n"
-                    f"{'─'*30}\n"
-                    f"🌡 *Макс:* {day['maxtemp_c']}°C\n"
-                    f"🌡❄️ *Мин:* {day['mintemp_c']}°C\n"
-                    f"{icon} *Состояние:* {day['condition']['text']}\n"
-                    f"💧 *Влажность:* {day['avghumidity']}%\n"
-                    f"💨 *Ветер:* {day['maxwind_kph']} км/ч\n"
-                    f"🌦 *Осадки:* {day['totalprecip_mm']} мм\n"
-                    f"{'─'*30}\n"
-                    f"🕒 *Периоды суток:*"
-                )
-
-                periods = group_hours_by_period(hours)
-                for period_name, entries in periods.items():
-                    if entries:
-                        forecast_text += f"\n\n{period_name}:\n" + "\n".join(entries)
-
-                await message.answer(forecast_text, parse_mode="Markdown")
-            else:
-                await message.answer("⚠ Указан неизвестный населённый пункт")
+
+    try:
+        cached = await get_forecast(http, city_name)
+    except ProviderUnavailable as e:
+        await message.answer(str(e), reply_markup=kb.inline_menu)
+        await state.clear()
+        return
+
+    if cached:
+        forecast_text = render_cache.get_or_render(
+            cached.render_key('day1'), lambda: render_weather_one_day(cached))
+
+        await message.answer(forecast_text, parse_mode="Markdown")
+    else:
+        await message.answer("⚠ Указан неизвестный населённый пункт")
 
     await message.answer("Выберите опцию:", reply_markup=kb.inline_menu)
     await state.clear()
@@ -505,44 +440,25 @@ async def get_weather(callback: CallbackQuery, state: FSMContext):
 
 # Обработка состояния
 @router.message(RequestWeather.request_weather)
-async def weather(message: Message, state: FSMContext):
+async def weather(message: Message, state: FSMContext, http: HttpClient):
     await state.update_data(request_weather=message.text)
     tg_data = await state.get_data()
     city_name = tg_data['request_weather']
-    url = f"http://api.weatherapi.com/v1/forecast.json?key={WEATHER_TOKEN}&q={city_name}&days=3&lang=ru"
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            if response.status == 200:
-                data = await response.json()
-                location = data["location"]
-                result = f"📍 *Местоположение:* {location['name']}, {location['country']}\nПрогноз на 3 дня:\n"
-
-                for forecast in data["forecast"]["forecastday"]:
-                    d = forecast["day"]
-                    hours = forecast["hour"]
-                    icon = get_weather_icon(d['condition']['text'])
-
-                    result += (
-                        f"\n{'─'*30}\n"
-                        f"📅 *{forecast['date']}*\n"
-                        f"🌡 Макс: {d['maxtemp_c']}°C | Мин: {d['mintemp_c']}°C\n"
-                        f"{icon} Состояние: {d['condition']['text']}\n"
-                        f"💧 Влажность: {d['avghumidity']}%\n"
-                        f"💨 Ветер: {d['maxwind_kph']} км/ч\n"
-                        f"🌦 Осадки: {d['totalprecip_mm']} мм\n"
-                        f"{'─'*30}\n"
-                        f"🕒 *Периоды суток:*"
-                    )
-
-                    periods = group_hours_by_period(hours)
-                    for period_name, entries in periods.items():
-                        if entries:
-                            result += f"\n\n{period_name}:\n" + "\n".join(entries)
-
-                await message.answer(result, parse_mode="Markdown")
-            else:
-                await message.answer("⚠ Указан неизвестный населённый пункт")
+
+    try:
+        cached = await get_forecast(http, city_name)
+    except ProviderUnavailable as e:
+        await message.answer(str(e), reply_markup=kb.inline_menu)
+        await state.clear()
+        return
+
+    if cached:
+        result = render_cache.get_or_render(
+            cached.render_key('day3'), lambda: render_weather(cached))
+
+        await message.answer(result, parse_mode="Markdown")
+    else:
+        await message.answer("⚠ Указан неизвестный населённый пункт")
 
     await message.answer("Выберите опцию:", reply_markup=kb.inline_menu)
     await state.clear()
@@ -556,7 +472,8 @@ async def get_forecast_for_more_cities(callback: CallbackQuery, state:FSMContext
 
 # Обработка ввода
 @router.message(RequestWeather.forecast_for_more_cities)
-async def set_forecast_for_more_cities(message: Message, state: FSMContext):
+async def set_forecast_for_more_cities(message: Message, state: FSMContext, http: HttpClient,
+                                       meteogram_prefetcher: Optional[MeteogramPrefetcher] = None):
     await state.update_data(forecast_for_more_cities=message.text)
 
     # Начало отсчёта работы скрипта
@@ -572,59 +489,227 @@ async def set_forecast_for_more_cities(message: Message, state: FSMContext):
         await message.answer("Не указано ни одного города. Попробуйте снова")
 
     # Получение данных из city_data
+    city_registry = get_city_registry()
+    found = []
     for city_name in cities:
-        city_info = next((city for city in city_data if city['eng_name'] == city_name), None)
+        # Точный поиск, при опечатке или латинице - ближайший город
+        city_info = city_registry.match(city_name)
 
         if city_info:
-            city_url = city_info['url']
-
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(city_url) as response:
-                        if response.status == 200:
-
-                            # Обработка изображения
-                            image_data = await response.read()
-                            temp_file = f"images/temp_{city_name.lower()}.png"
-
-                            # Открытие изображения
-                            with open(temp_file, 'wb') as f:
-                                f.write(image_data)
-
-                            # Подсчёт времени работы скрипта
-                            end_time = time.time()
-                            elapsed_time = end_time - start_time
-
-                            # Отправка сообщения о погоде
-                            await message.answer_photo(
-                                photo=FSInputFile(temp_file),
-                                caption=f"Прогноз на 5 дней для населённого пункта: {city_name.capitalize()}"
-                                        f"\nВремя, затраченное на отправку: {elapsed_time:.2f} секунд")
-                        else:
-                            await message.answer("Ошибка загрузки данных!")
-
-            except Exception as e:
-                await message.answer(f"Произошла ошибка: {e}")
+            found.append(city_info)
         else:
-            await message.answer("Город не найден")
+            suggestions = [city.eng_name.capitalize() for _, city in city_registry.search(city_name, limit=3)]
+            if suggestions:
+                await message.answer(f"Город {city_name.capitalize()} не найден. Возможно, вы имели в виду: "
+                                     f"{', '.join(suggestions)}")
+            else:
+                await message.answer("Город не найден")
+
+    # Параллельная загрузка метеограмм (или получение из кэша)
+    urls = [city_info.url for city_info in found]
+    if meteogram_prefetcher:
+        meteogram_prefetcher.track(urls)
+    entries = await fetch_meteograms(http, urls)
+
+    # Подсчёт времени работы скрипта
+    elapsed_time = time.time() - start_time
+
+    media = []
+    sent_entries = []
+    unavailable = None
+    for city_info, entry in zip(found, entries):
+        if isinstance(entry, ProviderUnavailable):
+            # Сервер ГМЦ недоступен: одно сообщение вместо ошибки по каждому городу
+            unavailable = entry
+            continue
+        if isinstance(entry, Exception):
+            await message.answer(f"Произошла ошибка: {entry}")
+            continue
+        if entry is None:
+            await message.answer("Ошибка загрузки данных!")
+            continue
+
+        if entry.file_id:
+            # Файл уже загружен в Telegram
+            photo = entry.file_id
+        else:
+            # Отправка изображения прямо из памяти
+            photo = BufferedInputFile(entry.data, filename=f"{url_city_name(city_info.url)}.png")
+
+        sent_entries.append(entry)
+        media.append(InputMediaPhoto(
+            media=photo,
+            caption=f"Прогноз на 5 дней для населённого пункта: {city_info.eng_name.capitalize()}"
+                    f"\nВремя, затраченное на отправку: {elapsed_time:.2f} секунд"))
+
+    if unavailable:
+        await message.answer(str(unavailable))
+
+    # Отправка метеограмм одним альбомом
+    try:
+        sent = await send_album(message, media)
+        remember_file_ids(sent_entries, sent)
+    except Exception as e:
+        await message.answer(f"Произошла ошибка: {e}")
 
     await message.answer("Выберите опцию:", reply_markup=kb.inline_menu)
     await state.clear()
 
-def get_clean_text(td_element):
-    if td_element is None:
-        return "нет данных"
-    text = td_element.get_text(strip=True)
-    if text.startswith('+'):
-        text = text[1:]
-    return text
+# Текст сводки МС за день; values - очищенные значения ячеек строки таблицы summary.php
+def render_summary(station_id, date_str, values):
+    station_name = values[1]
+    temp_avg = values[3]
+    temp_dt_avg = values[4]
+    temp_min = values[6]
+    temp_max = values[7]
+    humidity = values[8]
+    humidity_min = values[9]
+    eff_te_min = values[10]
+    eff_te_max = values[11]
+    eff_tes_max = values[12]
+    wind = values[13]
+    wind_gust = values[14]
+    min_view = values[15]
+    
+    # Перевод из ГПА в ММ. РТ. СТ.
+    avg_pressure = float(values[16]) * 0.75
+    min_pressure = float(values[17]) * 0.75
+    max_pressure = float(values[18]) * 0.75
+    
+    avg_mark_cloud = values[22]
+    low_mark_cloud = values[23]
+    night_precip = values[24]
+    day_precip = values[25]
+    sum_precip = values[26]
+    snow_cover = values[27]
+    case_rain = values[29]
+    case_snow = values[30]
+    case_fog = values[31]
+    case_mist = values[32]
+    case_snowstorm = values[33]
+    case_snowfall = values[34]
+    case_thunderstorm = values[35]
+    case_tornado = values[36]
+    case_dust_storm = values[37]
+    case_dustfall = values[38]
+    case_hail = values[39]
+    case_black_ice = values[40]
+
+    return (
+        f"📊 Данные МС {station_id} — {station_name} за {date_str}:\n\n"
+
+        f"🌡 Температуры:\n"
+        f"  • Максимальная: {temp_max} °C\n"
+        f"  • Средняя: {temp_avg} °C\n"
+        f"  • Минимальная: {temp_min} °C\n"
+        f"  • Температурная аномалия: {temp_dt_avg} °С\n"
+        f"  • Эффективная температура в тени (мин.): {eff_te_min} °С\n"
+        f"  • Эффективная температура в тени (макс.): {eff_te_max} °С\n"
+        f"  • Эффективная температура на Солнце (макс.): {eff_tes_max} °С\n\n"
+
+        f"📈 Давление (мм рт. ст.):\n"
+        f"  • Среднее: {str(avg_pressure)[:5]}\n"
+        f"  • Минимальное: {str(min_pressure)[:5]}\n"
+        f"  • Максимальное: {str(max_pressure)[:5]}\n\n"
+
+        f"💨 Ветер:\n"
+        f"  • Средняя скорость: {wind} м/с\n"
+        f"  • Порывы: {wind_gust} м/с\n\n"
+
+        f"👁 Видимость:\n"
+        f"  • Минимальная: {min_view}\n\n"
+
+        f"💦 Влажность:\n"
+        f"  • Средняя: {humidity} %\n"
+        f"  • Минимальная: {humidity_min} %\n\n"
+
+        f"🌧 Осадки (мм):\n"
+        f"  • Ночью: {night_precip if night_precip else '0.0'}\n"
+        f"  • Днём: {day_precip if day_precip else '0.0'}\n"
+        f"  • Суммарно: {sum_precip}\n\n"
+
+        f"☁️ Облачность (в баллах):\n"
+        f"  • Средняя: {avg_mark_cloud} км\n"
+        f"  • Нижняя: {low_mark_cloud} км\n\n"
+
+        f"❄️ Снежный покров (см): {snow_cover if snow_cover else '—'}\n\n"
+
+        f"🌀 Явления (сроки):\n"
+        f"  • Снег: {case_snow if case_snow else '—'}\n"
+        f"  • Дождь: {case_rain if case_rain else '—'}\n"
+        f"  • Гололёд: {case_black_ice if case_black_ice else '—'}\n"
+        f"  • Туман: {case_fog if case_fog else '—'}\n"
+        f"  • Мгла: {case_mist if case_mist else '—'}\n"
+        f"  • Метель: {case_snowstorm if case_snowstorm else '—'}\n"
+        f"  • Позёмок: {case_snowfall if case_snowfall else '—'}\n"
+        f"  • Торнадо: {case_tornado if case_tornado else '—'}\n"
+        f"  • Пылевая буря: {case_dust_storm if case_dust_storm else '—'}\n"
+        f"  • Пылевой позёмок: {case_dustfall if case_dustfall else '—'}\n"
+        f"  • Гроза: {case_thunderstorm if case_thunderstorm else '—'}\n"
+        f"  • Град: {case_hail + ' мм' if case_hail else '—'}\n\n"
+    )
+
+# Текст сводки МС за период по результату aggregate_summary
+def render_summary_period(station_id, start, end, stats, missing):
+    def value(number, suffix=""):
+        return "—" if number is None else f"{number:.1f}{suffix}"
+
+    temp_max, temp_max_date = stats['temp_max']
+    temp_min, temp_min_date = stats['temp_min']
+    precip_max, precip_max_date = stats['precip_max']
+    text = (
+        f"📊 Данные МС {station_id} за {start:%d.%m.%Y}-{end:%d.%m.%Y} ({stats['days']} дн.):\n\n"
+
+        f"🌡 Температуры:\n"
+        f"  • Средняя за период: {value(stats['temp_mean'], ' °C')}\n"
+        f"  • Абсолютный максимум: {value(temp_max, ' °C')} ({temp_max_date or '—'})\n"
+        f"  • Абсолютный минимум: {value(temp_min, ' °C')} ({temp_min_date or '—'})\n\n"
+
+        f"🌧 Осадки (мм):\n"
+        f"  • Сумма: {value(stats['precip_total'])}\n"
+        f"  • Дней с осадками: {stats['precip_days']}\n"
+        f"  • Максимум за сутки: {value(precip_max)} ({precip_max_date if precip_max else '—'})\n\n"
+
+        f"🌀 Дней с явлениями:\n"
+    )
+    phenomena = [(name, stats['phenomena'][field]) for field, name in PHENOMENA.items()
+                 if stats['phenomena'][field]]
+    text += "".join(f"  • {name}: {days}\n" for name, days in phenomena) or "  • —\n"
+    if missing:
+        text += f"\n⚠️ Нет данных за месяцев: {missing}\n"
+    return text + "\n"
+
+async def answer_summary_period(message: Message, station_id, start, end, start_time):
+    if end < start:
+        await message.answer("⚠️ Дата окончания периода раньше даты начала.")
+        return
+    if len(months_between(start, end)) > MAX_RANGE_MONTHS:
+        await message.answer(f"⚠️ Период не должен превышать {MAX_RANGE_MONTHS} месяца.")
+        return
+
+    # Период целиком есть в архиве ingest.py - считаем по нему, без обращения к сайту
+    stats = archive_summary(station_id, start, end)
+    if stats is not None:
+        summary = render_summary_period(station_id, start, end, stats, 0)
+    else:
+        rows, missing = await fetch_summary_range(station_id, start, end)
+        if not rows:
+            await message.answer("⚠️ Таблица не найдена. Проверь код станции или дату.")
+            return
+
+        summary = render_cache.get_or_render(
+            ('pogodaiklimat', station_id, start, end, tuple(rows), 'summary_period'),
+            lambda: render_summary_period(station_id, start, end, aggregate_summary(rows), missing))
+    elapsed = time.time() - start_time
+    await message.answer(summary + f"⏱ Затрачено: {elapsed:.2f} сек.")
 
 @router.callback_query(F.data == "summary_search")
 async def get_summary(callback: CallbackQuery, state:FSMContext):
     await state.set_state(RequestWeather.summary)
     await callback.message.answer(
-        "Формат ввода: Факт.данные _код_станции_ _дата_\n"
-        "Пример ввода: Факт.данные 34123 11.08.2025"
+        "Формат ввода: Факт.данные _код_или_название_станции_ _дата_\n"
+        "Пример ввода: Факт.данные 34123 11.08.2025\n"
+        "Сводка за период: Факт.данные 34123 01.06.2025-31.08.2025"
         )
     await callback.answer()
 
@@ -634,142 +719,76 @@ async def set_summary(message: Message, state: FSMContext):
     
     # Начало отсчёта работы скрипта
     start_time = time.time()
-    
-    session = login_pik()
-    if not session:
-        print('Программа остановлена из-за ошибки авторизации')
 
     tg_data = await state.get_data()
     summary_text = tg_data['summary']
     
-    match = re.match(r"Факт\.данные\s+(\S+)\s+(\d{2}\.\d{2}\.\d{4})", summary_text)
-    if match:
-        input_id_or_name = match.group(1)
-        date_str = match.group(2)
+    match = re.match(r"Факт\.данные\s+(.+?)\s+(\d{2}\.\d{2}\.\d{4})(?:\s*-\s*(\d{2}\.\d{2}\.\d{4}))?",
+                     summary_text)
+    if not match:
+        await message.answer("⚠️ Неверный формат запроса.\n"
+                             "Пример ввода: Факт.данные 34123 11.08.2025 или Факт.данные Воронеж 11.08.2025",
+                             reply_markup=kb.inline_menu)
+        await state.clear()
+        return
+
+    input_id_or_name = match.group(1)
+    date_str = match.group(2)
+    end_str = match.group(3)
+
+    # Код станции или её точное название -> индекс ВМО; при опечатке - только подсказки
+    station_catalog = get_station_catalog()
+    station_id = station_catalog.resolve(input_id_or_name)
+    if station_id is None:
+        suggestions = [f"{station.name} ({station.wmo_id})"
+                       for _, station in station_catalog.search(input_id_or_name, limit=3)]
+        text = f"⚠️ Станция {input_id_or_name} не найдена."
+        if suggestions:
+            text += (f" Возможно, вы имели в виду: {', '.join(suggestions)}.\n"
+                     f"Повторите запрос с названием или кодом станции.")
+        await message.answer(text, reply_markup=kb.inline_menu)
+        await state.clear()
+        return
 
-        if input_id_or_name.isdigit():
-            station_id = input_id_or_name
-    
     try:
         date_obj = datetime.strptime(date_str, "%d.%m.%Y")
         month = date_obj.month
         year = date_obj.year
         
-        url = f"http://www.pogodaiklimat.ru/summary.php?m={month}&y={year}&id={station_id}"
-        
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = session.get(url, headers=headers)
-        response.encoding = 'utf-8'
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        table = soup.find("table", {"class": "tab"})
-        if not table:
+        # Прошедшие месяцы берутся из локального кэша, текущий обновляется не чаще
+        # CURRENT_MONTH_TTL; авторизованная сессия общая для всех запросов.
+        # Если сайт недоступен, данные из кэша и архива всё равно выдаются
+        try:
+            if end_str:
+                await answer_summary_period(message, station_id, date_obj.date(),
+                                            datetime.strptime(end_str, "%d.%m.%Y").date(), start_time)
+                await message.answer("Выберите опцию:", reply_markup=kb.inline_menu)
+                await state.clear()
+                return
+            rows = await fetch_summary_month(station_id, year, month)
+        except PikAuthError as e:
+            print(f'Программа остановлена из-за ошибки авторизации: {e}')
+            await message.answer("⚠️ Не удалось авторизоваться на pogodaiklimat.ru, попробуйте позже.",
+                                 reply_markup=kb.inline_menu)
+            await state.clear()
+            return
+        except ProviderUnavailable as e:
+            await message.answer(str(e), reply_markup=kb.inline_menu)
+            await state.clear()
+            return
+
+        if rows is None:
             await message.answer("⚠️ Таблица не найдена. Проверь код станции или дату.")
 
-        rows = table.find_all("tr")[2:]
-
-        for row in rows:
-            cols = row.find_all("td")
-            if not cols or len(cols) < 15:
-                continue
-
-            date_in_row = cols[2].get_text(strip=True)
-
-            if date_in_row == date_str:
-                station_name = get_clean_text(cols[1])
-                temp_avg = get_clean_text(cols[3])
-                temp_dt_avg = get_clean_text(cols[4])
-                temp_min = get_clean_text(cols[6])
-                temp_max = get_clean_text(cols[7])
-                humidity = get_clean_text(cols[8])
-                humidity_min = get_clean_text(cols[9])
-                eff_te_min = get_clean_text(cols[10])
-                eff_te_max = get_clean_text(cols[11])
-                eff_tes_max = get_clean_text(cols[12])
-                wind = get_clean_text(cols[13])
-                wind_gust = get_clean_text(cols[14])
-                min_view = get_clean_text(cols[15])
-                
-                # Перевод из ГПА в ММ. РТ. СТ.
-                avg_pressure = float(get_clean_text(cols[16])) * 0.75
-                min_pressure = float(get_clean_text(cols[17])) * 0.75
-                max_pressure = float(get_clean_text(cols[18])) * 0.75
-                
-                avg_mark_cloud = get_clean_text(cols[22])
-                low_mark_cloud = get_clean_text(cols[23])
-                night_precip = get_clean_text(cols[24])
-                day_precip = get_clean_text(cols[25])
-                sum_precip = get_clean_text(cols[26])
-                snow_cover = get_clean_text(cols[27])
-                case_rain = get_clean_text(cols[29])
-                case_snow = get_clean_text(cols[30])
-                case_fog = get_clean_text(cols[31])
-                case_mist = get_clean_text(cols[32])
-                case_snowstorm = get_clean_text(cols[33])
-                case_snowfall = get_clean_text(cols[34])
-                case_thunderstorm = get_clean_text(cols[35])
-                case_tornado = get_clean_text(cols[36])
-                case_dust_storm = get_clean_text(cols[37])
-                case_dustfall = get_clean_text(cols[38])
-                case_hail = get_clean_text(cols[39])
-                case_black_ice = get_clean_text(cols[40])
-                
-                elapsed = time.time() - start_time
-                
-                await message.answer(
-                    f"📊 Данные МС {station_id} — {station_name} за {date_str}:\n\n"
-
-                    f"🌡 Температуры:\n"
-                    f"  • Максимальная: {temp_max} °C\n"
-                    f"  • Средняя: {temp_avg} °C\n"
-                    f"  • Минимальная: {temp_min} °C\n"
-                    f"  • Температурная аномалия: {temp_dt_avg} °С\n"
-                    f"  • Эффективная температура в тени (мин.): {eff_te_min} °С\n"
-                    f"  • Эффективная температура в тени (макс.): {eff_te_max} °С\n"
-                    f"  • Эффективная температура на Солнце (макс.): {eff_tes_max} °С\n\n"
-
-                    f"📈 Давление (мм рт. ст.):\n"
-                    f"  • Среднее: {str(avg_pressure)[:5]}\n"
-                    f"  • Минимальное: {str(min_pressure)[:5]}\n"
-                    f"  • Максимальное: {str(max_pressure)[:5]}\n\n"
-
-                    f"💨 Ветер:\n"
-                    f"  • Средняя скорость: {wind} м/с\n"
-                    f"  • Порывы: {wind_gust} м/с\n\n"
-
-                    f"👁 Видимость:\n"
-                    f"  • Минимальная: {min_view}\n\n"
-
-                    f"💦 Влажность:\n"
-                    f"  • Средняя: {humidity} %\n"
-                    f"  • Минимальная: {humidity_min} %\n\n"
-
-                    f"🌧 Осадки (мм):\n"
-                    f"  • Ночью: {night_precip if night_precip else '0.0'}\n"
-                    f"  • Днём: {day_precip if day_precip else '0.0'}\n"
-                    f"  • Суммарно: {sum_precip}\n\n"
-
-                    f"☁️ Облачность (в баллах):\n"
-                    f"  • Средняя: {avg_mark_cloud} км\n"
-                    f"  • Нижняя: {low_mark_cloud} км\n\n"
-
-                    f"❄️ Снежный покров (см): {snow_cover if snow_cover else '—'}\n\n"
-
-                    f"🌀 Явления (сроки):\n"
-                    f"  • Снег: {case_snow if case_snow else '—'}\n"
-                    f"  • Дождь: {case_rain if case_rain else '—'}\n"
-                    f"  • Гололёд: {case_black_ice if case_black_ice else '—'}\n"
-                    f"  • Туман: {case_fog if case_fog else '—'}\n"
-                    f"  • Мгла: {case_mist if case_mist else '—'}\n"
-                    f"  • Метель: {case_snowstorm if case_snowstorm else '—'}\n"
-                    f"  • Позёмок: {case_snowfall if case_snowfall else '—'}\n"
-                    f"  • Торнадо: {case_tornado if case_tornado else '—'}\n"
-                    f"  • Пылевая буря: {case_dust_storm if case_dust_storm else '—'}\n"
-                    f"  • Пылевой позёмок: {case_dustfall if case_dustfall else '—'}\n"
-                    f"  • Гроза: {case_thunderstorm if case_thunderstorm else '—'}\n"
-                    f"  • Град: {case_hail + ' мм' if case_hail else '—'}\n\n"
-                    f"⏱ Затрачено: {elapsed:.2f} сек."
-                )
+        row = find_day(rows or [], date_str)
+        if row:
+            values = row.cells
+            summary = render_cache.get_or_render(
+                ('pogodaiklimat', station_id, date_str, values, 'summary'),
+                lambda: render_summary(station_id, date_str, values))
+
+            elapsed = time.time() - start_time
+            await message.answer(summary + f"⏱ Затрачено: {elapsed:.2f} сек.")
         
         await message.answer("Выберите опцию:", reply_markup=kb.inline_menu)
         await state.clear()
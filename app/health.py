@@ -0,0 +1,237 @@
+import time
+import asyncio
+import logging
+
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.client import HttpClient
+
+logger = logging.getLogger(__name__)
+
+load_dotenv('other/.env')
+
+# Названия источников для сообщений пользователю
+PROVIDER_TITLES = {
+    'weatherapi': 'прогнозов weatherapi.com',
+    'pws': 'данных АМС',
+    'gmc': 'метеограмм ГМЦ',
+    'pik': 'pogodaiklimat.ru',
+}
+
+
+# Источник недоступен по результатам последней проверки: обработчик сразу отвечает
+# пользователю, а не ждёт таймаута
+class ProviderUnavailable(Exception):
+    def __init__(self, provider: str, detail: str = ''):
+        self.provider = provider
+        self.detail = detail
+        super().__init__(
+            f"⚠️ Сервис {PROVIDER_TITLES.get(provider, provider)} сейчас недоступен, попробуйте позже.")
+
+
+# Для источника не заданы ключи или учётные данные: это ошибка настройки, а не сбой,
+# источник не считается недоступным и повторно не проверяется
+class ProviderNotConfigured(Exception):
+    pass
+
+
+@dataclass
+class ProviderStatus:
+    provider: str
+    ok: bool
+    detail: str
+    checked_at: float
+    latency: float
+    configured: bool = True
+    # Кто сообщил состояние: HealthMonitor или фоновая задача, которая и так обращается к источнику
+    source: str = 'monitor'
+
+
+# Последние результаты проверок источников
+class ProviderHealth:
+    def __init__(self):
+        self._statuses: dict[str, ProviderStatus] = {}
+
+    def update(self, status: ProviderStatus):
+        self._statuses[status.provider] = status
+
+    def get(self, provider) -> Optional[ProviderStatus]:
+        return self._statuses.get(provider)
+
+    def is_down(self, provider):
+        """Источник ещё не проверялся или не настроен - считается доступным"""
+        status = self._statuses.get(provider)
+        return status is not None and status.configured and not status.ok
+
+    def ensure(self, provider):
+        if self.is_down(provider):
+            raise ProviderUnavailable(provider, self._statuses[provider].detail)
+
+    def __iter__(self):
+        return iter(self._statuses.values())
+
+
+provider_health = ProviderHealth()
+
+
+# Периодическая проверка источников. У каждого источника своё расписание: доступный
+# проверяется раз в interval, недоступный - через retry_interval с удвоением паузы
+# до interval, ненастроенный - больше не проверяется. Источник, о котором недавно
+# сообщила другая фоновая задача (АМС - StationPoller), не проверяется отдельно
+class HealthMonitor:
+    def __init__(
+        self,
+        http: HttpClient,
+        health: ProviderHealth = provider_health,
+        interval: int = 600,
+        retry_interval: int = 60,
+        timeout: float = 15
+    ):
+        self.http = http
+        self.health = health
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self.checks = {
+            'weatherapi': self.check_weatherapi,
+            'pws': self.check_pws,
+            'gmc': self.check_gmc,
+            'pik': self.check_pik,
+        }
+        self._failures = {}
+        self._task = None
+
+    # Каждая проверка возвращает описание результата или выбрасывает исключение
+    async def check_weatherapi(self):
+        from app.forecast import WEATHER_TOKEN
+
+        if not WEATHER_TOKEN:
+            raise ProviderNotConfigured("не задан WEATHER_TOKEN")
+        params = {'key': WEATHER_TOKEN, 'q': 'Moscow'}
+        async with self.http.get("http://api.weatherapi.com/v1/current.json", 'weatherapi',
+                                 params=params) as response:
+            if response.status != 200:
+                raise RuntimeError(f"статус {response.status}")
+        return "ключ принят"
+
+    # АМС, ГМЦ и pogodaiklimat.ru считаются недоступными только при сбое соединения,
+    # таймауте или ответе 5xx: остальные статусы (204, 401, 404, 405) относятся к ключу,
+    # станции или файлу, а не к серверу, и не должны блокировать все запросы к нему.
+    # Для АМС проверяется одна станция
+    async def check_pws(self):
+        from app.pws import PWS_URL
+        from app.stations import get_station_registry
+
+        stations = list(get_station_registry().values())
+        if not stations:
+            raise ProviderNotConfigured("станции не настроены")
+        station = stations[0]
+        params = {'stationId': station.station_id, 'format': 'json', 'units': 'm',
+                  'apiKey': station.api_key}
+        async with self.http.get(PWS_URL, 'pws', params=params) as response:
+            if response.status >= 500:
+                raise RuntimeError(f"{station.station_id}: статус {response.status}")
+        return f"{station.station_id}: статус {response.status}"
+
+    # Метеограмма запрашивается так же, как при отправке пользователю (GET)
+    async def check_gmc(self):
+        from load import get_city_registry
+
+        city = get_city_registry().get('МОСКВА')
+        async with self.http.get(city.url, 'gmc') as response:
+            if response.status >= 500:
+                raise RuntimeError(f"статус {response.status}")
+        return f"статус {response.status}"
+
+    async def check_pik(self):
+        from app.pik import LOGIN, PASSWORD, LOGIN_URL
+
+        if not LOGIN or not PASSWORD:
+            raise ProviderNotConfigured("не заданы PIK_LOGIN и PIK_PASSWORD")
+        async with self.http.get(LOGIN_URL, 'pik') as response:
+            if response.status >= 500:
+                raise RuntimeError(f"статус {response.status}")
+        return f"статус {response.status}"
+
+    async def _probe(self, provider, check):
+        start = time.monotonic()
+        ok, configured = False, True
+        try:
+            detail = await asyncio.wait_for(check(), self.timeout)
+            ok = True
+        except ProviderNotConfigured as e:
+            detail = str(e)
+            configured = False
+        except asyncio.TimeoutError:
+            detail = f"нет ответа за {self.timeout} сек."
+        except Exception as e:
+            detail = f"{type(e).__name__}: {e}"
+        status = ProviderStatus(provider, ok, detail, time.time(), time.monotonic() - start, configured)
+        self.health.update(status)
+        return status
+
+    def _reported(self, provider):
+        """Свежее состояние от другой фоновой задачи или None"""
+        status = self.health.get(provider)
+        if status is not None and status.source != 'monitor' and time.time() - status.checked_at < self.interval:
+            return status
+        return None
+
+    def next_check(self, status: ProviderStatus):
+        """Время следующей проверки источника (time.time()) или None, если проверять не нужно"""
+        if not status.configured:
+            return None
+        if status.source != 'monitor':
+            return status.checked_at + self.interval
+        if status.ok:
+            self._failures.pop(status.provider, None)
+            return status.checked_at + self.interval
+        failures = self._failures[status.provider] = self._failures.get(status.provider, 0) + 1
+        return status.checked_at + min(self.interval, self.retry_interval * 2 ** (failures - 1))
+
+    async def refresh(self, providers=None):
+        """Проверка источников (по умолчанию всех); для недавно сообщённых - их состояние"""
+        providers = list(self.checks) if providers is None else providers
+        reported = {provider: self._reported(provider) for provider in providers}
+        statuses = await asyncio.gather(*(
+            self._probe(provider, self.checks[provider]) for provider in providers
+            if reported[provider] is None))
+        for status in statuses:
+            if status.ok:
+                logger.info(f"✅ {status.provider}: {status.detail} ({status.latency:.2f} сек.)")
+            elif not status.configured:
+                logger.warning(f"⚙️ {status.provider}: {status.detail}, проверка отключена")
+            else:
+                logger.warning(f"❌ {status.provider}: {status.detail}")
+        return list(statuses) + [status for status in reported.values() if status is not None]
+
+    async def run(self):
+        schedule = {provider: 0.0 for provider in self.checks}
+        while True:
+            due = [provider for provider, at in schedule.items() if at is not None and at <= time.time()]
+            try:
+                for status in await self.refresh(due):
+                    schedule[status.provider] = self.next_check(status)
+            except Exception as e:
+                logger.error(f"Ошибка проверки источников: {e}", exc_info=True)
+                for provider in due:
+                    schedule[provider] = time.time() + self.retry_interval
+            pending = [at for at in schedule.values() if at is not None]
+            await asyncio.sleep(max(1.0, min(pending) - time.time()) if pending else self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,74 @@
+import numpy as np
+
+from app.risk import risk_levels
+
+# Времена суток по часу: 0-5 ночь, 6-11 утро, 12-17 день, 18-23 вечер
+PERIOD_NAMES = ["🌙 Ночь", "🌅 Утро", "☀ День", "🌇 Вечер"]
+# Порядок вывода, как и раньше: утро, день, вечер, ночь
+PERIOD_ORDER = [1, 2, 3, 0]
+PERIODS = len(PERIOD_NAMES)
+
+# Почасовой прогноз всех дней ответа в виде столбцов NumPy.
+# Разбирается один раз и хранится вместе с прогнозом в кэше
+class HourlyTable:
+    def __init__(self, forecast_days: list):
+        hours = [hour for day in forecast_days for hour in day['hour']]
+        self.days = len(forecast_days)
+
+        self.day = np.repeat(np.arange(self.days), [len(day['hour']) for day in forecast_days])
+        self.hour = np.array([int(hour['time'][-5:-3]) for hour in hours], dtype=np.int8)
+        self.temp = np.array([hour['temp_c'] for hour in hours])
+        self.wind = np.array([hour['wind_kph'] for hour in hours])
+        self.precip = np.array([hour['precip_mm'] for hour in hours])
+        self.gust = np.array([hour.get('gust_kph', np.nan) for hour in hours], dtype=np.float64)
+        self.uv = np.array([hour.get('uv', np.nan) for hour in hours], dtype=np.float64)
+        self.pressure = np.array([hour.get('pressure_mb', np.nan) for hour in hours], dtype=np.float64)
+        self.dew_point = np.array([hour.get('dewpoint_c', np.nan) for hour in hours], dtype=np.float64)
+        self.conditions, self.condition = np.unique(
+            [hour['condition']['text'] for hour in hours], return_inverse=True)
+
+    def risk(self):
+        """Уровень опасности 1..5 для каждого часа прогноза"""
+        return risk_levels(
+            temperature=self.temp,
+            wind_speed=self.wind / 3.6,     # км/ч -> м/с
+            wind_gust=self.gust / 3.6,
+            uv_index=self.uv,
+            pressure=self.pressure,
+            dew_point=self.dew_point
+        )
+
+    def digest(self):
+        """Сводка по (день, время суток): мин/макс/средняя температура, сумма осадков,
+        максимальный ветер, преобладающее состояние погоды и уровень опасности"""
+        groups = self.days * PERIODS
+        group = self.day * PERIODS + self.hour // 6
+        count = np.bincount(group, minlength=groups)
+
+        temp_min = np.full(groups, np.inf)
+        temp_max = np.full(groups, -np.inf)
+        wind_max = np.zeros(groups)
+        np.minimum.at(temp_min, group, self.temp)
+        np.maximum.at(temp_max, group, self.temp)
+        np.maximum.at(wind_max, group, self.wind)
+        temp_sum = np.bincount(group, weights=self.temp, minlength=groups)
+        precip_sum = np.bincount(group, weights=self.precip, minlength=groups)
+
+        votes = np.zeros((groups, len(self.conditions)), dtype=np.int16)
+        np.add.at(votes, (group, self.condition), 1)
+
+        risk = np.ones(groups, dtype=np.int8)
+        np.maximum.at(risk, group, self.risk())
+
+        # Списки [день][время суток]: дальше значения только форматируются в текст
+        shape = (self.days, PERIODS)
+        return {
+            'count': count.reshape(shape).tolist(),
+            'temp_min': temp_min.reshape(shape).tolist(),
+            'temp_max': temp_max.reshape(shape).tolist(),
+            'temp_mean': (temp_sum / np.maximum(count, 1)).reshape(shape).tolist(),
+            'precip': precip_sum.reshape(shape).tolist(),
+            'wind_max': wind_max.reshape(shape).tolist(),
+            'condition': votes.argmax(axis=1).reshape(shape).tolist(),
+            'risk': risk.reshape(shape).tolist(),
+        }
@@ -0,0 +1,210 @@
+import time
+import asyncio
+
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from aiogram.types import Message, InputMediaPhoto
+
+from app.health import provider_health
+
+# Одновременных загрузок с сервера ГМЦ (общий лимит на все запросы пользователей)
+MAX_CONCURRENT_DOWNLOADS = 10
+# Ограничение Telegram на количество файлов в альбоме
+MEDIA_GROUP_LIMIT = 10
+# Максимальный размер одной метеограммы и общий объём одновременно скачиваемых данных
+MAX_METEOGRAM_SIZE = 2 * 1024 * 1024
+MAX_DOWNLOAD_BYTES = 32 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+download_semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+
+# Ограничение памяти: загрузка ждёт, пока в общем бюджете не освободится нужный объём
+class MemoryBudget:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reserve(self, size: int):
+        size = min(size, self.limit)
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.used + size <= self.limit)
+            self.used += size
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.used -= size
+                self._condition.notify_all()
+
+
+download_budget = MemoryBudget(MAX_DOWNLOAD_BYTES)
+
+# Метеограмма в кэше: заголовки для условного запроса и file_id уже загруженного в Telegram файла.
+# Байты хранятся в памяти только до первой отправки, дальше достаточно file_id
+@dataclass
+class MeteogramEntry:
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    file_id: Optional[str] = None
+    data: Optional[bytes] = None
+    expires: float = 0.0
+
+    @property
+    def fresh(self):
+        return time.monotonic() < self.expires
+
+    @property
+    def sendable(self):
+        return self.file_id is not None or self.data is not None
+
+# Кэш метеограмм по url с TTL и вытеснением давно не использованных записей (LRU).
+# Байты ещё не отправленных метеограмм ограничены max_bytes
+class MeteogramCache:
+    def __init__(self, ttl: int = 1800, max_size: int = 512, max_bytes: int = 64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.data_bytes = 0
+        self._entries: OrderedDict[str, MeteogramEntry] = OrderedDict()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def get(self, url):
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def put(self, entry: MeteogramEntry):
+        entry.expires = time.monotonic() + self.ttl
+        old = self._entries.pop(entry.url, None)
+        if old is not None and old.data is not None:
+            self.data_bytes -= len(old.data)
+        if entry.data is not None:
+            self.data_bytes += len(entry.data)
+        self._entries[entry.url] = entry
+
+        while len(self._entries) > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            if evicted.data is not None:
+                self.data_bytes -= len(evicted.data)
+
+        # Сначала освобождаются байты самых старых записей
+        for old in self._entries.values():
+            if self.data_bytes <= self.max_bytes:
+                break
+            if old is not entry:
+                self.drop_data(old)
+
+    def drop_data(self, entry: MeteogramEntry):
+        if entry.data is not None and self._entries.get(entry.url) is entry:
+            self.data_bytes -= len(entry.data)
+        entry.data = None
+
+    def set_file_id(self, sent: MeteogramEntry, file_id: str):
+        # Запись могла обновиться, пока файл загружался в Telegram
+        entry = self._entries.get(sent.url)
+        if entry is None or (entry.etag, entry.last_modified) != (sent.etag, sent.last_modified):
+            return
+        entry.file_id = file_id
+        self.drop_data(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+meteogram_cache = MeteogramCache()
+
+# Чтение ответа прямо в память в пределах общего бюджета, без временных файлов
+async def read_limited(response):
+    size = response.content_length or MAX_METEOGRAM_SIZE
+    if size > MAX_METEOGRAM_SIZE:
+        return None
+
+    async with download_budget.reserve(size):
+        chunks = []
+        received = 0
+        async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+            received += len(chunk)
+            if received > MAX_METEOGRAM_SIZE:
+                return None
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+# Загрузка одной метеограммы с учётом кэша: свежая запись отдаётся без запроса,
+# устаревшая проверяется условным GET (If-None-Match / If-Modified-Since).
+# Возвращается копия записи, чтобы вытеснение из кэша не затронуло отправку.
+# force - проверить на сервере даже свежую запись (фоновое обновление)
+async def fetch_meteogram(http, semaphore, url, force=False):
+    entry = meteogram_cache.get(url)
+    if entry is not None and entry.fresh and entry.sendable and not force:
+        meteogram_cache.hits += 1
+        return replace(entry)
+
+    # Сервер ГМЦ недоступен: отдаём устаревшую метеограмму, если она есть
+    if provider_health.is_down('gmc') and entry is not None and entry.sendable:
+        return replace(entry)
+    provider_health.ensure('gmc')
+
+    headers = {}
+    if entry is not None and entry.sendable:
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+
+    async with semaphore:
+        async with http.get(url, 'gmc', headers=headers) as response:
+            if response.status == 304 and headers:
+                meteogram_cache.revalidated += 1
+                meteogram_cache.put(entry)
+                return replace(entry)
+            if response.status != 200:
+                return None
+
+            data = await read_limited(response)
+            if data is None:
+                return None
+
+            meteogram_cache.misses += 1
+            entry = MeteogramEntry(
+                url=url,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+                data=data
+            )
+            meteogram_cache.put(entry)
+            return replace(entry)
+
+# Параллельная загрузка метеограмм через общий HTTP-клиент, результат по каждому url:
+# запись кэша, None при ошибке сервера или исключение
+async def fetch_meteograms(http, urls, force=False):
+    return await asyncio.gather(
+        *(fetch_meteogram(http, download_semaphore, url, force) for url in urls),
+        return_exceptions=True
+    )
+
+# Запоминание file_id отправленных фотографий, чтобы не загружать их в Telegram повторно
+def remember_file_ids(entries: list[MeteogramEntry], messages: list[Message]):
+    for entry, sent in zip(entries, messages):
+        if sent.photo:
+            meteogram_cache.set_file_id(entry, sent.photo[-1].file_id)
+
+# Отправка фотографий альбомами по 10 штук, возвращает отправленные сообщения
+async def send_album(message: Message, media: list[InputMediaPhoto]):
+    sent = []
+    for i in range(0, len(media), MEDIA_GROUP_LIMIT):
+        chunk = media[i:i + MEDIA_GROUP_LIMIT]
+        if len(chunk) == 1:
+            # Альбом должен содержать минимум 2 файла
+            sent.append(await message.answer_photo(photo=chunk[0].media, caption=chunk[0].caption))
+        else:
+            sent.extend(await message.answer_media_group(media=chunk))
+    return sent
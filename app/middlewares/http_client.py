@@ -0,0 +1,21 @@
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from typing import Callable, Dict, Any, Awaitable
+
+from app.client import HttpClient
+
+# Передача общего HTTP-клиента в обработчики (аргумент http)
+class HttpClientMiddleware(BaseMiddleware):
+    def __init__(self, client: HttpClient):
+        self.client = client
+        super().__init__()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        data['http'] = self.client
+        return await handler(event, data)
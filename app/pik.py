@@ -0,0 +1,134 @@
+import os
+import asyncio
+import logging
+
+import aiohttp
+
+from bs4 import BeautifulSoup
+from dotenv import load_dotenv
+
+from app.client import PROVIDER_TIMEOUTS
+
+logger = logging.getLogger(__name__)
+
+load_dotenv('other/.env')
+
+LOGIN = os.getenv('PIK_LOGIN')
+PASSWORD = os.getenv('PIK_PASSWORD')
+LOGIN_URL = "http://www.pogodaiklimat.ru/login.php"
+# Куки авторизации сохраняются между перезапусками бота
+COOKIE_PATH = 'other/pik_cookies.pickle'
+# Одновременных запросов к pogodaiklimat.ru
+PIK_CONNECTIONS = 4
+
+PIK_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'
+}
+
+
+class PikAuthError(Exception):
+    pass
+
+
+# Страница сайта для авторизованного пользователя содержит ссылку выхода
+def is_logged_in(html: str):
+    return "Выход" in html or "logout" in html.lower()
+
+
+# Долгоживущая авторизованная сессия pogodaiklimat.ru.
+# Вход выполняется лениво: при первом запросе без сохранённых куки или когда ответ
+# показывает, что сессия истекла. Одновременные запросы не запускают параллельных входов
+class PikSession:
+    def __init__(self, cookie_path: str = COOKIE_PATH, connections: int = PIK_CONNECTIONS):
+        self.cookie_path = cookie_path
+        self.connections = connections
+        self._session = None
+        self._lock = asyncio.Lock()
+        # Номер текущего входа: запрос, увидевший истёкшую сессию, перелогинивается,
+        # только если никто не сделал этого раньше него
+        self._generation = 0
+        self.logged_in = False
+        self.logins = 0
+
+    async def start(self):
+        if self._session is None or self._session.closed:
+            jar = aiohttp.CookieJar()
+            if os.path.exists(self.cookie_path):
+                try:
+                    jar.load(self.cookie_path)
+                    self.logged_in = len(jar) > 0
+                except Exception as e:
+                    logger.warning(f"Не удалось загрузить куки {self.cookie_path}: {e}")
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.connections),
+                cookie_jar=jar,
+                headers=PIK_HEADERS,
+                timeout=PROVIDER_TIMEOUTS['pik']
+            )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            raise RuntimeError("Сессия pogodaiklimat.ru не запущена")
+        return self._session
+
+    async def _login(self, generation):
+        async with self._lock:
+            if generation == self._generation:
+                await self._do_login()
+        if not self.logged_in:
+            raise PikAuthError("Не удалось авторизоваться. Проверь логин и пароль.")
+
+    async def _do_login(self):
+        async with self.session.get(LOGIN_URL) as response:
+            soup = BeautifulSoup(await response.text(encoding='utf-8'), 'html.parser')
+
+        hidden_inputs = soup.find_all("input", type="hidden")
+        data = {inp['name']: inp.get('value', '') for inp in hidden_inputs}
+        data.update({
+            'username': LOGIN,
+            'password': PASSWORD,
+            'submit': 'Войти',
+        })
+
+        async with self.session.post(LOGIN_URL, data=data) as response:
+            html = await response.text(encoding='utf-8')
+
+        self._generation += 1
+        self.logins += 1
+        self.logged_in = is_logged_in(html)
+        if not self.logged_in:
+            return
+
+        logger.info("Успешно авторизовались на сайте.")
+        try:
+            self.session.cookie_jar.save(self.cookie_path)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить куки {self.cookie_path}: {e}")
+
+    async def _get(self, url):
+        async with self.session.get(url) as response:
+            return await response.text(encoding='utf-8')
+
+    async def fetch(self, url: str) -> str:
+        """HTML страницы от имени авторизованного пользователя"""
+        generation = self._generation
+        if not self.logged_in:
+            await self._login(generation)
+            return await self._get(url)
+
+        html = await self._get(url)
+        if not is_logged_in(html):
+            # Сессия истекла: один повторный вход и повтор запроса
+            await self._login(generation)
+            html = await self._get(url)
+        return html
+
+
+pik_session = PikSession()
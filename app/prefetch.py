@@ -0,0 +1,94 @@
+import random
+import asyncio
+import logging
+
+from collections import Counter
+
+from app.client import HttpClient
+from app.meteogram import fetch_meteograms
+
+logger = logging.getLogger(__name__)
+
+# Фоновое обновление метеограмм популярных городов, чтобы первый пользователь
+# после обновления ГМЦ не ждал загрузки
+class MeteogramPrefetcher:
+    def __init__(
+        self,
+        http: HttpClient,
+        top_n: int = 20,
+        interval: int = 3 * 3600,
+        jitter: int = 300,
+        concurrency: int = 4,
+        start_delay: int = 60
+    ):
+        self.http = http
+        self.top_n = top_n
+        self.interval = interval
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.start_delay = start_delay
+        self.requests: Counter[str] = Counter()
+        # Обновлённые метеограммы, которые ещё никто не запросил
+        self._pending: set[str] = set()
+        self.hits = 0
+        self.wasted = 0
+        self.cycles = 0
+        self._task = None
+
+    # Учёт запросов из set_forecast_for_more_cities
+    def track(self, urls):
+        self.requests.update(urls)
+        for url in urls:
+            if url in self._pending:
+                self._pending.discard(url)
+                self.hits += 1
+
+    async def refresh(self):
+        # Метеограммы прошлого цикла, которые никому не понадобились
+        self.wasted += len(self._pending)
+        self._pending.clear()
+
+        urls = [url for url, _ in self.requests.most_common(self.top_n)]
+        for i in range(0, len(urls), self.concurrency):
+            chunk = urls[i:i + self.concurrency]
+            results = await fetch_meteograms(self.http, chunk, force=True)
+            for url, entry in zip(chunk, results):
+                if isinstance(entry, Exception) or entry is None:
+                    logger.warning(f"Не удалось обновить метеограмму {url}: {entry}")
+                else:
+                    self._pending.add(url)
+
+        # Старые запросы постепенно теряют вес, чтобы список следовал за спросом
+        for url in list(self.requests):
+            self.requests[url] //= 2
+            if not self.requests[url]:
+                del self.requests[url]
+
+        self.cycles += 1
+        logger.info(
+            f"Обновлено метеограмм: {len(self._pending)}/{len(urls)}, "
+            f"попаданий: {self.hits}, лишних загрузок: {self.wasted}"
+        )
+
+    async def run(self):
+        await asyncio.sleep(self.start_delay)
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Ошибка обновления метеограмм: {e}", exc_info=True)
+            await asyncio.sleep(self.interval + random.uniform(-self.jitter, self.jitter))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
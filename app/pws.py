@@ -0,0 +1,78 @@
+import random
+import asyncio
+import logging
+
+import aiohttp
+
+from app.client import HttpClient
+from app.health import provider_health
+
+logger = logging.getLogger(__name__)
+
+PWS_URL = "https://api.weather.com/v2/pws/observations/current"
+# Попыток на один запрос и общий срок ответа пользователю, секунды
+PWS_ATTEMPTS = 3
+PWS_DEADLINE = 15
+# Пауза перед повтором: BACKOFF, 2*BACKOFF, ... плюс случайная добавка
+PWS_BACKOFF = 0.5
+# Коды ответа, при которых имеет смысл повторить запрос
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+# Сервер api.weather.com недоступен: все попытки исчерпаны или истёк срок
+class PwsUnavailable(Exception):
+    pass
+
+
+async def _request_observation(http: HttpClient, station_id: str, api_key: str):
+    params = {
+        'stationId': station_id,
+        'format': 'json',
+        'units': 'm',
+        'apiKey': api_key
+    }
+    async with http.get(PWS_URL, 'pws', params=params) as response:
+        if response.status in RETRY_STATUSES:
+            raise PwsUnavailable(f"статус {response.status}")
+        if response.status != 200:
+            logger.warning(f"АМС {station_id}: статус {response.status} - {await response.text()}")
+            return None
+        # 204 и пустое тело - у станции нет свежих наблюдений
+        data = await response.json(content_type=None) if await response.read() else None
+        if not data or not data.get('observations'):
+            logger.warning(f"АМС {station_id}: пустой ответ")
+            return None
+        return data['observations'][0]
+
+
+async def _fetch_with_retries(http, station_id, api_key, attempts, backoff):
+    for attempt in range(1, attempts + 1):
+        try:
+            return await _request_observation(http, station_id, api_key)
+        except (aiohttp.ClientError, asyncio.TimeoutError, PwsUnavailable) as e:
+            logger.warning(f"АМС {station_id}: попытка {attempt}/{attempts} не удалась: {e!r}")
+            if attempt == attempts:
+                raise PwsUnavailable(f"АМС {station_id}: {e!r}") from e
+            await asyncio.sleep(backoff * 2 ** (attempt - 1) + random.uniform(0, backoff))
+
+
+# Текущее наблюдение станции (элемент observations[0]) или None, если данных нет.
+# Каждая попытка ограничена таймаутом 'pws' клиента, все попытки вместе - deadline;
+# при недоступности сервера выбрасывается PwsUnavailable, а если он уже известен
+# как недоступный - сразу ProviderUnavailable (check_health=False - запрос всё равно)
+async def fetch_observation(
+    http: HttpClient,
+    station_id: str,
+    api_key: str,
+    attempts: int = PWS_ATTEMPTS,
+    deadline: float = PWS_DEADLINE,
+    backoff: float = PWS_BACKOFF,
+    check_health: bool = True
+):
+    if check_health:
+        provider_health.ensure('pws')
+    try:
+        return await asyncio.wait_for(
+            _fetch_with_retries(http, station_id, api_key, attempts, backoff), deadline)
+    except asyncio.TimeoutError as e:
+        raise PwsUnavailable(f"АМС {station_id}: истёк срок {deadline} сек.") from e
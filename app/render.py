@@ -0,0 +1,51 @@
+import sys
+
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+# Приблизительный объём ключа в памяти: кортежи учитываются вместе с элементами
+def key_size(key):
+    if isinstance(key, tuple):
+        return sys.getsizeof(key) + sum(key_size(item) for item in key)
+    return sys.getsizeof(key)
+
+# Кэш готовых текстов сообщений.
+# Ключ: (источник данных, место, версия данных, вид сообщения), поэтому при обновлении
+# данных старые тексты просто перестают запрашиваться и вытесняются по LRU.
+# В размер записи входит и ключ: в нём могут быть сами данные (строки таблицы за период)
+class RenderCache:
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._texts: OrderedDict[Hashable, str] = OrderedDict()
+        self._sizes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key, render: Callable[[], str]) -> str:
+        text = self._texts.get(key)
+        if text is not None:
+            self.hits += 1
+            self._texts.move_to_end(key)
+            return text
+
+        self.misses += 1
+        text = render()
+        self._texts[key] = text
+        self._sizes[key] = len(text.encode('utf-8')) + key_size(key)
+        self.size += self._sizes[key]
+        while self.size > self.max_bytes and len(self._texts) > 1:
+            evicted, _ = self._texts.popitem(last=False)
+            self.size -= self._sizes.pop(evicted)
+        return text
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {'texts': len(self._texts), 'bytes': self.size, 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0}
+
+    def __len__(self):
+        return len(self._texts)
+
+
+render_cache = RenderCache()
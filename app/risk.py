@@ -0,0 +1,76 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+RISK_LEVELS = {
+    1: "🟢 Дискомфорт отсутвует",
+    2: "🟡 Лёгкий дискомфорт",
+    3: "🟠 Повышенный дискомфорт",
+    4: "🔴 Дискомфорт высокой опасности",
+    5: "🟣 Дискомфорт экстремальной опасности"
+}
+
+# Пороги уровней опасности 2..5 по каждому параметру.
+# high: уровень растёт при value >= порога, low: при value <= порога (по возрастанию).
+# Итоговый уровень - максимум по параметрам; влажность в оценке не участвует
+RISK_THRESHOLDS = {
+    'temperature': {'high': (30, 35, 40, 45), 'low': (-45, -35, -25, -15)},  # °C
+    'wind_speed': {'high': (7, 15, 20, 25)},                                 # м/с
+    'wind_gust': {'high': (10, 20, 25, 33)},                                 # м/с
+    'uv_index': {'high': (3, 7, 9, 11)},
+    'pressure': {'high': (1020, 1040, 1060, 1080), 'low': (950, 970, 980, 990)},  # гПа
+    'dew_point': {'high': (12, 16, 20, 25)},                                 # °C
+}
+
+
+# Шкалы в виде (параметр, пороги high, пороги low) для скалярной оценки
+_SCALES = [
+    (name, scale.get('high', ()), scale.get('low', ()))
+    for name, scale in RISK_THRESHOLDS.items()
+]
+
+# Уровень опасности 1..5 для одного наблюдения; пропущенные параметры (None, NaN)
+# не учитываются
+def risk_level(**values):
+    level = 1
+    for name, high, low in _SCALES:
+        value = values.get(name)
+        if value is None or value != value:
+            continue
+        if high:
+            level = max(level, 1 + bisect_right(high, value))
+        if low:
+            level = max(level, 1 + len(low) - bisect_left(low, value))
+    return level
+
+# То же для столбцов наблюдений: массив уровней int8 той же длины. NaN не учитывается
+def risk_levels(**columns):
+    size = len(next(iter(columns.values())))
+    levels = np.ones(size, dtype=np.int8)
+    for name, column in columns.items():
+        scale = RISK_THRESHOLDS.get(name)
+        if scale is None:
+            continue
+        column = np.asarray(column, dtype=np.float64)
+        missing = np.isnan(column)
+        if 'high' in scale:
+            high = np.searchsorted(scale['high'], column, side='right') + 1
+            high[missing] = 1
+            np.maximum(levels, high, out=levels, casting='unsafe')
+        if 'low' in scale:
+            low = len(scale['low']) - np.searchsorted(scale['low'], column, side='left') + 1
+            low[missing] = 1
+            np.maximum(levels, low, out=levels, casting='unsafe')
+    return levels
+
+
+def get_risk_level(temperature, wind_speed_ms, wind_gust_ms, uv_index, pressure, humidity, dew_point):
+    level = risk_level(
+        temperature=temperature,
+        wind_speed=wind_speed_ms,
+        wind_gust=wind_gust_ms,
+        uv_index=uv_index,
+        pressure=pressure,
+        dew_point=dew_point
+    )
+    return RISK_LEVELS[level]
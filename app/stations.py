@@ -0,0 +1,196 @@
+import os
+import csv
+import time
+import random
+import asyncio
+import logging
+
+from dataclasses import dataclass
+from typing import NamedTuple, Optional
+
+from dotenv import load_dotenv
+
+from app.client import HttpClient
+from app.health import ProviderStatus, provider_health
+from app.pws import fetch_observation, PwsUnavailable
+from app.timeseries import StationSeries
+
+logger = logging.getLogger(__name__)
+
+load_dotenv('other/.env')
+
+STATIONS_PATH = 'other/stations.csv'
+
+
+# Строка other/stations.csv: название для поиска, stationId в api.weather.com,
+# название для ответа ("Погода в ...") и имя переменной окружения с API-ключом
+class Station(NamedTuple):
+    key: str
+    station_id: str
+    city_name: str
+    api_key: str
+
+# Функция загрузки справочника АМС; станции без ключа пропускаются
+def load_stations(file_path=STATIONS_PATH):
+    stations = {}
+
+    with open(file_path, mode='r', encoding='utf-8', newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        for row in reader:
+            if not row or row[0].startswith('#'):
+                continue
+            key, station_id, city_name, api_key_env = (value.strip() for value in row[:4])
+            api_key = os.getenv(api_key_env)
+            if not api_key:
+                logger.warning(f"АМС {station_id}: не задан ключ {api_key_env}, станция пропущена")
+                continue
+            stations[key.lower()] = Station(key.lower(), station_id, city_name, api_key)
+    return stations
+
+
+_station_registry = None
+
+# Ленивая загрузка, как и у справочника городов
+def get_station_registry():
+    global _station_registry
+    if _station_registry is None:
+        _station_registry = load_stations()
+    return _station_registry
+
+
+# Последнее наблюдение станции и время его получения
+@dataclass
+class Observation:
+    station_id: str
+    data: dict
+    fetched_at: float
+
+    @property
+    def observed_at(self):
+        """Время измерения по данным станции (epoch), иначе время загрузки"""
+        epoch = self.data.get('epoch')
+        return float(epoch) if epoch else self.fetched_at
+
+    @property
+    def age(self):
+        """Возраст измерения в секундах"""
+        return max(0.0, time.time() - self.observed_at)
+
+
+def _metric(data, field):
+    value = (data.get('metric') or {}).get(field)
+    return None if value is None else float(value)
+
+# Последние наблюдения всех станций в памяти и их история; наполняется StationPoller
+class ObservationStore:
+    def __init__(self):
+        self._observations: dict[str, Observation] = {}
+        self._series: dict[str, StationSeries] = {}
+
+    def get(self, station_id) -> Optional[Observation]:
+        return self._observations.get(station_id)
+
+    def series(self, station_id) -> Optional[StationSeries]:
+        return self._series.get(station_id)
+
+    def put(self, station_id, data: dict) -> Observation:
+        observation = Observation(station_id, data, time.time())
+        self._observations[station_id] = observation
+
+        series = self._series.get(station_id)
+        if series is None:
+            series = self._series[station_id] = StationSeries()
+        wind, gust = _metric(data, 'windSpeed'), _metric(data, 'windGust')
+        series.append(
+            observation.observed_at,
+            temp=_metric(data, 'temp'),
+            pressure=_metric(data, 'pressure'),
+            wind=None if wind is None else wind / 3.6,      # км/ч -> м/с
+            gust=None if gust is None else gust / 3.6,
+            precip=_metric(data, 'precipTotal')
+        )
+        return observation
+
+    def __len__(self):
+        return len(self._observations)
+
+
+observation_store = ObservationStore()
+
+
+# Фоновый опрос всех станций справочника: пользователи получают ответ из памяти,
+# а не ждут api.weather.com
+class StationPoller:
+    def __init__(
+        self,
+        http: HttpClient,
+        store: ObservationStore = observation_store,
+        interval: int = 300,
+        jitter: int = 15,
+        concurrency: int = 20
+    ):
+        self.http = http
+        self.store = store
+        self.interval = interval
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.cycles = 0
+        self.failures = 0
+        self._task = None
+
+    # True - наблюдение получено, False - сервер ответил без данных, None - сервер недоступен
+    async def _poll(self, semaphore, station: Station):
+        async with semaphore:
+            try:
+                # Опрос идёт и при отметке "недоступен": по нему и видно восстановление сервера
+                data = await fetch_observation(self.http, station.station_id, station.api_key,
+                                               check_health=False)
+            except PwsUnavailable as e:
+                logger.warning(f"Не удалось опросить АМС {station.station_id}: {e}")
+                self.failures += 1
+                return None
+            except Exception as e:
+                logger.warning(f"Не удалось опросить АМС {station.station_id}: {e}")
+                data = None
+        if data is None:
+            self.failures += 1
+            return False
+        self.store.put(station.station_id, data)
+        return True
+
+    async def refresh(self):
+        stations = list(get_station_registry().values())
+        semaphore = asyncio.Semaphore(self.concurrency)
+        start = time.monotonic()
+        results = await asyncio.gather(*(self._poll(semaphore, station) for station in stations))
+
+        self.cycles += 1
+        logger.info(f"Опрошено АМС: {sum(1 for result in results if result)}/{len(stations)}")
+        # Состояние api.weather.com для HealthMonitor: сервер доступен, если ответил хотя бы одной станции
+        if stations:
+            unavailable = sum(1 for result in results if result is None)
+            provider_health.update(ProviderStatus(
+                'pws', unavailable < len(stations), f"опрос станций: недоступно {unavailable}/{len(stations)}",
+                time.time(), time.monotonic() - start, source='poller'))
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Ошибка опроса АМС: {e}", exc_info=True)
+            await asyncio.sleep(self.interval + random.uniform(-self.jitter, self.jitter))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,281 @@
+import re
+import asyncio
+import logging
+
+from datetime import date, datetime
+from typing import NamedTuple, Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+from app.pik import pik_session, PIK_CONNECTIONS
+from app.health import ProviderUnavailable, provider_health
+from app.catalog import learn_station
+from app.db.summary_cache import get_month, put_month
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_URL = "http://www.pogodaiklimat.ru/summary.php?m={month}&y={year}&id={station_id}"
+
+# Столбцы таблицы summary.php, используемые ботом
+SUMMARY_FIELDS = {
+    'station_name': 1,
+    'date': 2,
+    'temp_avg': 3,
+    'temp_anomaly': 4,
+    'temp_min': 6,
+    'temp_max': 7,
+    'humidity': 8,
+    'humidity_min': 9,
+    'eff_temp_min': 10,
+    'eff_temp_max': 11,
+    'eff_temp_sun_max': 12,
+    'wind': 13,
+    'wind_gust': 14,
+    'visibility_min': 15,
+    'pressure_avg': 16,
+    'pressure_min': 17,
+    'pressure_max': 18,
+    'cloud_avg': 22,
+    'cloud_low': 23,
+    'precip_night': 24,
+    'precip_day': 25,
+    'precip_total': 26,
+    'snow_cover': 27,
+    'rain': 29,
+    'snow': 30,
+    'fog': 31,
+    'mist': 32,
+    'snowstorm': 33,
+    'drifting_snow': 34,
+    'thunderstorm': 35,
+    'tornado': 36,
+    'dust_storm': 37,
+    'dust_drift': 38,
+    'hail': 39,
+    'black_ice': 40,
+}
+
+# Явления погоды: ячейка заполнена (сроки), если явление наблюдалось в этот день
+PHENOMENA = {
+    'rain': 'Дождь',
+    'snow': 'Снег',
+    'black_ice': 'Гололёд',
+    'fog': 'Туман',
+    'mist': 'Мгла',
+    'snowstorm': 'Метель',
+    'drifting_snow': 'Позёмок',
+    'tornado': 'Торнадо',
+    'dust_storm': 'Пылевая буря',
+    'dust_drift': 'Пылевой позёмок',
+    'thunderstorm': 'Гроза',
+    'hail': 'Град',
+}
+# Наибольший период одного запроса
+MAX_RANGE_MONTHS = 24
+# Через сколько дней после окончания месяца его таблица больше не меняется
+COMPLETE_MONTH_DELAY_DAYS = 3
+
+
+# Строка таблицы summary.php за один день: дата (дд.мм.гггг) и очищенные тексты ячеек
+class SummaryRow(NamedTuple):
+    date: str
+    cells: tuple
+
+    def text(self, field):
+        ix = SUMMARY_FIELDS[field]
+        return self.cells[ix] if ix < len(self.cells) else ""
+
+    def number(self, field) -> Optional[float]:
+        """Числовое значение ячейки или None для пустых и нечисловых значений"""
+        try:
+            return float(self.text(field).replace(',', '.'))
+        except ValueError:
+            return None
+
+
+def clean_text(td_element):
+    if td_element is None:
+        return "нет данных"
+    text = td_element.get_text(strip=True)
+    if text.startswith('+'):
+        text = text[1:]
+    return text
+
+def _summary_row(date, cells):
+    return SummaryRow(date, tuple(cell[1:] if cell.startswith('+') else cell for cell in cells))
+
+# Строки за дни месяца; None, если на странице нет таблицы (неверный код станции).
+# Полный разбор страницы BeautifulSoup - медленный, но устойчивый вариант
+def parse_summary_table_bs4(html: str):
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table", {"class": "tab"})
+    if not table:
+        return None
+
+    rows = []
+    for row in table.find_all("tr")[2:]:
+        cols = row.find_all("td")
+        if not cols or len(cols) < 15:
+            continue
+        rows.append(SummaryRow(cols[2].get_text(strip=True), tuple(clean_text(col) for col in cols)))
+    return rows
+
+# Начало таблицы с классом tab; разбирается только её фрагмент, а не вся страница
+TABLE_START = re.compile(r'<table\b[^>]*\bclass\s*=\s*["\']?(?:[^"\'>]*\s)?tab(?:\s[^"\'>]*)?["\'\s>]', re.I)
+TABLE_END = re.compile(r'</table\s*>', re.I)
+
+def _cell_text(td):
+    # Как get_text(strip=True): каждый текстовый узел обрезается и склеивается без пробелов
+    return ''.join(text.strip() for text in td.itertext())
+
+def parse_summary_table_lxml(html: str):
+    start = TABLE_START.search(html)
+    if start is None:
+        return None
+    end = TABLE_END.search(html, start.end())
+    fragment = html[start.start():end.end() if end is not None else len(html)]
+    table = lxml_html.fragment_fromstring(fragment)
+
+    rows = []
+    for row in list(table.iter('tr'))[2:]:
+        cols = [_cell_text(td) for td in row.iter('td')]
+        if not cols or len(cols) < 15:
+            continue
+        rows.append(_summary_row(cols[2], cols))
+    return rows
+
+# Доступные способы разбора; по умолчанию - lxml, если он установлен
+SUMMARY_PARSERS = {'bs4': parse_summary_table_bs4}
+if lxml_html is not None:
+    SUMMARY_PARSERS['lxml'] = parse_summary_table_lxml
+SUMMARY_PARSER = 'lxml' if lxml_html is not None else 'bs4'
+
+def parse_summary_table(html: str, parser: str = None):
+    parser = parser or SUMMARY_PARSER
+    if parser == 'bs4':
+        return parse_summary_table_bs4(html)
+    try:
+        return SUMMARY_PARSERS[parser](html)
+    except Exception as e:
+        logger.warning(f"Разбор summary.php через {parser} не удался, используется bs4: {e}")
+        return parse_summary_table_bs4(html)
+
+# Строка за день появляется на сайте на следующие сутки, поэтому месяц считается
+# окончательным только спустя несколько дней после его окончания
+def is_complete_month(year: int, month: int, today: date = None):
+    """Месяц закончился, и его данные больше не изменятся"""
+    today = today or date.today()
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    return (today - next_month).days >= COMPLETE_MONTH_DELAY_DAYS
+
+# Таблица за месяц из локального кэша или с сайта; None, если таблицы нет
+async def fetch_summary_month(station_id: str, year: int, month: int):
+    # Пока сайт недоступен, подходит и устаревшая таблица текущего месяца
+    cached = await get_month(station_id, year, month, stale=provider_health.is_down('pik'))
+    if cached is not None:
+        rows = [SummaryRow(date, tuple(cells)) for date, cells in cached]
+    else:
+        provider_health.ensure('pik')
+        html = await pik_session.fetch(SUMMARY_URL.format(month=month, year=year, station_id=station_id))
+        rows = parse_summary_table(html)
+        if rows is not None:
+            await put_month(station_id, year, month, rows, complete=is_complete_month(year, month))
+
+    # Название станции из таблицы пополняет справочник для запросов по названию
+    if rows:
+        await learn_station(station_id, rows[0].text('station_name'))
+    return rows
+
+def find_day(rows, date_str):
+    for row in rows:
+        if row.date == date_str:
+            return row
+    return None
+
+def months_between(start: date, end: date):
+    return [
+        (index // 12, index % 12 + 1)
+        for index in range(start.year * 12 + start.month - 1, end.year * 12 + end.month)
+    ]
+
+# Строки за период [start, end] по порядку дат и число месяцев без таблицы.
+# Месяцы загружаются параллельно, не более concurrency запросов к сайту одновременно.
+# Если сайт недоступен, период строится по месяцам из кэша, остальные считаются
+# пропущенными; ProviderUnavailable - только когда в кэше нет ни одного месяца
+async def fetch_summary_range(station_id: str, start: date, end: date, concurrency: int = PIK_CONNECTIONS):
+    semaphore = asyncio.Semaphore(concurrency)
+    unavailable = []
+
+    async def load(year, month):
+        async with semaphore:
+            try:
+                return await fetch_summary_month(station_id, year, month)
+            except ProviderUnavailable as e:
+                unavailable.append(e)
+                return None
+
+    months = await asyncio.gather(*(load(year, month) for year, month in months_between(start, end)))
+    if unavailable and all(month_rows is None for month_rows in months):
+        raise unavailable[0]
+
+    rows, missing = [], 0
+    for month_rows in months:
+        if month_rows is None:
+            missing += 1
+            continue
+        for row in month_rows:
+            try:
+                day = datetime.strptime(row.date, "%d.%m.%Y").date()
+            except ValueError:
+                continue
+            if start <= day <= end:
+                rows.append((day, row))
+    rows.sort(key=lambda item: item[0])
+    return [row for _, row in rows], missing
+
+def _extreme(rows, field, pick):
+    values = [(row.number(field), row.date) for row in rows if row.number(field) is not None]
+    # При равенстве - первый по дате день
+    return pick(values, key=lambda item: item[0]) if values else (None, None)
+
+# Статистика за период: средняя и экстремальные температуры, осадки, дни с явлениями
+def aggregate_summary(rows):
+    temps = [value for value in (row.number('temp_avg') for row in rows) if value is not None]
+    precip = [(row.number('precip_total') or 0.0, row.date) for row in rows]
+    return {
+        'days': len(rows),
+        'temp_mean': sum(temps) / len(temps) if temps else None,
+        'temp_max': _extreme(rows, 'temp_max', max),
+        'temp_min': _extreme(rows, 'temp_min', min),
+        'precip_total': sum(value for value, _ in precip),
+        'precip_days': sum(1 for value, _ in precip if value > 0),
+        'precip_max': max(precip, key=lambda item: item[0]) if precip else (None, None),
+        'phenomena': {field: sum(1 for row in rows if row.text(field)) for field in PHENOMENA},
+    }
+
+# Предварительная загрузка последних months месяцев по списку станций
+async def warm_up(station_ids, months: int = 12, concurrency: int = PIK_CONNECTIONS):
+    today = date.today()
+    periods = []
+    for shift in range(months):
+        index = today.year * 12 + today.month - 1 - shift
+        periods.append((index // 12, index % 12 + 1))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def load(station_id, year, month):
+        async with semaphore:
+            try:
+                return await fetch_summary_month(station_id, year, month) is not None
+            except Exception as e:
+                logger.warning(f"Не удалось загрузить {station_id} за {month:02d}.{year}: {e}")
+                return False
+
+    results = await asyncio.gather(*(
+        load(station_id, year, month) for station_id in station_ids for year, month in periods))
+    return sum(results), len(results)
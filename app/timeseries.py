@@ -0,0 +1,69 @@
+import math
+
+import numpy as np
+
+# Поля наблюдения АМС, которые хранятся в истории
+SERIES_FIELDS = ('temp', 'pressure', 'wind', 'gust', 'precip')
+# Ёмкость по умолчанию: сутки с запасом при опросе раз в 5 минут
+SERIES_CAPACITY = 512
+
+
+# История наблюдений одной станции в кольцевом буфере фиксированного размера.
+# Добавление - O(1), старые значения перезаписываются, поэтому память не растёт
+# сколько бы бот ни работал. Пропуски хранятся как NaN
+class StationSeries:
+    def __init__(self, capacity: int = SERIES_CAPACITY):
+        self.capacity = capacity
+        self.time = np.full(capacity, -np.inf)
+        self.values = {field: np.full(capacity, np.nan) for field in SERIES_FIELDS}
+        self._head = 0
+        self.count = 0
+
+    @property
+    def last_time(self):
+        return self.time[self._head - 1] if self.count else -math.inf
+
+    def append(self, t: float, **values):
+        """Добавляет наблюдение; повтор уже сохранённого измерения игнорируется"""
+        if t <= self.last_time:
+            return False
+        ix = self._head
+        self.time[ix] = t
+        for field in SERIES_FIELDS:
+            value = values.get(field)
+            self.values[field][ix] = np.nan if value is None else value
+        self._head = (ix + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        return True
+
+    def _window(self, field, seconds, now=None):
+        now = self.last_time if now is None else now
+        mask = self.time >= now - seconds
+        mask &= ~np.isnan(self.values[field])
+        return self.time[mask], self.values[field][mask]
+
+    def min_max(self, field, seconds, now=None):
+        """(минимум, максимум) поля за окно или None, если данных нет"""
+        _, values = self._window(field, seconds, now)
+        if not values.size:
+            return None
+        return float(values.min()), float(values.max())
+
+    def max(self, field, seconds, now=None):
+        _, values = self._window(field, seconds, now)
+        return float(values.max()) if values.size else None
+
+    def tendency(self, field, seconds, now=None):
+        """Изменение поля за окно: последнее значение минус самое раннее в окне.
+        None, если измерения охватывают меньше 3/4 окна"""
+        times, values = self._window(field, seconds, now)
+        if values.size < 2:
+            return None
+        first, last = times.argmin(), times.argmax()
+        if times[last] - times[first] < 0.75 * seconds:
+            return None
+        return float(values[last] - values[first])
+
+    @property
+    def nbytes(self):
+        return self.time.nbytes + sum(values.nbytes for values in self.values.values())
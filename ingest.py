@@ -0,0 +1,58 @@
+import sys
+import asyncio
+import logging
+import argparse
+
+from datetime import date, datetime
+
+from app.archive import ARCHIVE_DIR, ingest
+from app.pik import pik_session
+
+logger = logging.getLogger(__name__)
+
+
+def parse_month(value, last_day=False):
+    month = datetime.strptime(value, "%m.%Y").date()
+    if last_day:
+        next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        return date.fromordinal(next_month.toordinal() - 1)
+    return month
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Загрузка архива summary.php pogodaiklimat.ru в столбцовые файлы .npz по станциям")
+    parser.add_argument('stations', nargs='+', help="коды станций, например 34123 27612")
+    parser.add_argument('--from', dest='start', required=True, help="первый месяц, мм.гггг")
+    parser.add_argument('--to', dest='end', required=True, help="последний месяц, мм.гггг")
+    parser.add_argument('--out', default=ARCHIVE_DIR, help=f"каталог архива (по умолчанию {ARCHIVE_DIR})")
+    parser.add_argument('--html-dir', help="офлайн-режим: каталог сохранённых страниц "
+                                           "{станция}_{год}_{месяц:02}.html вместо сайта")
+    parser.add_argument('--rate', type=float, default=1.0, help="запросов к сайту в секунду")
+    parser.add_argument('--concurrency', type=int, default=4, help="одновременных запросов")
+    return parser.parse_args(argv)
+
+async def main(argv=None):
+    args = parse_args(argv)
+    start, end = parse_month(args.start), parse_month(args.end, last_day=True)
+
+    if not args.html_dir:
+        await pik_session.start()
+    try:
+        totals = await ingest(args.stations, start, end, directory=args.out, html_dir=args.html_dir,
+                              rate=args.rate, concurrency=args.concurrency)
+    finally:
+        await pik_session.close()
+
+    logger.info(
+        f"Загружено месяцев: {totals['fetched']}, уже в архиве: {totals['skipped']}, "
+        f"без таблицы: {totals['missing']}, ошибок: {totals['failed']}")
+    return 1 if totals['failed'] else 0
+
+
+# Пример: python ingest.py 34123 27612 --from 01.2015 --to 12.2024
+if __name__ == '__main__':
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    sys.exit(asyncio.run(main()))
@@ -1,4 +1,29 @@
+import os
 import csv
+import mmap
+import struct
+import sys
+
+from array import array
+from bisect import bisect_left
+from typing import NamedTuple
+
+from app.fuzzy import TrigramIndex, has_latin, transliterate
+
+CSV_PATH = 'other/city_data.csv'
+SNAPSHOT_PATH = 'other/city_data.bin'
+
+# Заголовок снимка: сигнатура (версия формата), порядок байт и количество городов;
+# 12 байт, чтобы все разделы начинались со смещения, кратного 4
+SNAPSHOT_MAGIC = b'CIT3'
+SNAPSHOT_HEADER = struct.Struct('<4sc3xI')
+UINT32 = struct.Struct('<I')
+
+
+class City(NamedTuple):
+    eng_name: str
+    rus_name: str
+    url: str
 
 # Функция загрузки данных из city_data
 def load_city_data(file_path):
@@ -10,4 +35,237 @@ def load_city_data(file_path):
             city_data.append({'eng_name': row[0].strip(), 'rus_name': row[1].strip(), 'url': row[2].strip()})
     return city_data
 
-city_data = load_city_data('other/city_data.csv')
\ No newline at end of file
+# Приведение названия к единому виду: регистр, '_' и лишние пробелы, ё -> е, латиница -> кириллица
+def normalize_city_name(name):
+    name = ' '.join(name.replace('_', ' ').split()).upper()
+    if has_latin(name):
+        name = transliterate(name)
+    return name.replace('Ё', 'Е')
+
+# Транслитерированное имя из ссылки на метеограмму (.../MOSKWA.png -> MOSKWA)
+def url_city_name(url):
+    return url.rsplit('/', 1)[-1].split('.png')[0].strip('.')
+
+# Индекс названий: нормализованные названия (eng_name, rus_name, имя из ссылки) в порядке
+# записей, номер записи для каждого и порядок названий по алфавиту для двоичного поиска.
+# При дубликатах остаётся первая запись
+def build_name_index(cities):
+    first = {}
+    for ix in range(len(cities)):
+        city = cities[ix]
+        for key in (city.eng_name, city.rus_name, url_city_name(city.url)):
+            name = normalize_city_name(key)
+            if name and name not in first:
+                first[name] = ix
+    names = list(first)
+    order = array('I', sorted(range(len(names)), key=names.__getitem__))
+    return names, array('I', first.values()), order
+
+def build_fuzzy_index(names, name_city):
+    fuzzy = TrigramIndex()
+    for name, ix in zip(names, name_city):
+        fuzzy.add(name, ix)
+    return fuzzy
+
+
+# Разделы снимка: число элементов uint32, затем для строк - n + 1 смещений uint32
+# и UTF-8 блок, для чисел - n значений uint32; каждый раздел выровнен по 4 байта
+def _pack_strings(strings):
+    blob = bytearray()
+    offsets = array('I', [0])
+    for string in strings:
+        blob += string.encode('utf-8')
+        offsets.append(len(blob))
+    blob += b'\0' * (-len(blob) % 4)
+    return UINT32.pack(len(strings)) + offsets.tobytes() + bytes(blob)
+
+def _pack_uints(values):
+    values = array('I', values)
+    return UINT32.pack(len(values)) + values.tobytes()
+
+# Сборка бинарного снимка: записи городов по столбцам, индекс названий
+# и триграммный индекс, чтобы при запуске ничего не пересчитывать
+def compile_city_data(csv_path=CSV_PATH, snapshot_path=SNAPSHOT_PATH):
+    cities = [City(**row) for row in load_city_data(csv_path)]
+    names, name_city, name_order = build_name_index(cities)
+    fuzzy = build_fuzzy_index(names, name_city)
+    grams = sorted(fuzzy._postings)
+    posting_offsets = array('I', [0])
+    postings = array('I')
+    for gram in grams:
+        postings.extend(fuzzy._postings[gram])
+        posting_offsets.append(len(postings))
+
+    with open(snapshot_path, 'wb') as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, sys.byteorder[0].encode(), len(cities)))
+        for column in City._fields:
+            f.write(_pack_strings([getattr(city, column) for city in cities]))
+        f.write(_pack_strings(names))
+        f.write(_pack_uints(name_city))
+        f.write(_pack_uints(name_order))
+        f.write(_pack_strings(grams))
+        f.write(_pack_uints(posting_offsets))
+        f.write(_pack_uints(postings))
+    return len(cities)
+
+# Строки раздела снимка; декодируются при обращении
+class SnapshotStrings:
+    def __init__(self, buffer, offsets, start):
+        self._buffer = buffer
+        self._offsets = offsets
+        self._start = start
+
+    def __getitem__(self, ix):
+        if not 0 <= ix < len(self):
+            raise IndexError(ix)
+        return self._buffer[self._start + self._offsets[ix]:self._start + self._offsets[ix + 1]].decode('utf-8')
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+# Триграмма -> номера названий; триграммы ищутся двоичным поиском
+class SnapshotPostings:
+    def __init__(self, grams, offsets, postings):
+        self._grams = grams
+        self._offsets = offsets
+        self._postings = postings
+
+    def get(self, gram, default=None):
+        ix = bisect_left(self._grams, gram)
+        if ix == len(self._grams) or self._grams[ix] != gram:
+            return default
+        return self._postings[self._offsets[ix]:self._offsets[ix + 1]]
+
+# Снимок, отображённый в память: строки декодируются только при обращении к записи,
+# индексы названий читаются прямо из файла
+class CitySnapshot:
+    def __init__(self, snapshot_path):
+        with open(snapshot_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, byteorder, count = SNAPSHOT_HEADER.unpack_from(self._mmap)
+        if magic != SNAPSHOT_MAGIC or byteorder != sys.byteorder[0].encode():
+            raise ValueError(f"Неподходящий снимок городов: {snapshot_path}")
+
+        self._count = count
+        self._pos = SNAPSHOT_HEADER.size
+        self._columns = [self._read_strings() for _ in City._fields]
+        self.names = self._read_strings()
+        self.name_city = self._read_uints()
+        self.name_order = self._read_uints()
+        grams = self._read_strings()
+        self.postings = SnapshotPostings(grams, self._read_uints(), self._read_uints())
+
+    def _read_uints(self):
+        (n,) = UINT32.unpack_from(self._mmap, self._pos)
+        start = self._pos + UINT32.size
+        self._pos = start + n * 4
+        return memoryview(self._mmap)[start:self._pos].cast('I')
+
+    def _read_strings(self):
+        (n,) = UINT32.unpack_from(self._mmap, self._pos)
+        start = self._pos + UINT32.size
+        offsets = memoryview(self._mmap)[start:start + (n + 1) * 4].cast('I')
+        blob = start + (n + 1) * 4
+        self._pos = blob + offsets[n] + (-offsets[n] % 4)
+        return SnapshotStrings(self._mmap, offsets, blob)
+
+    def __getitem__(self, ix):
+        if not 0 <= ix < self._count:
+            raise IndexError(ix)
+        return City(*(column[ix] for column in self._columns))
+
+    def __len__(self):
+        return self._count
+
+# Названия в алфавитном порядке: последовательность для bisect поверх таблицы названий
+class SortedNames:
+    def __init__(self, names, order):
+        self._names = names
+        self._order = order
+
+    def __getitem__(self, ix):
+        return self._names[self._order[ix]]
+
+    def __len__(self):
+        return len(self._order)
+
+# Реестр городов: точный и префиксный поиск двоичным поиском по названиям,
+# нечёткий поиск с учётом опечаток и транслитерации.
+# Индексы хранят номера записей, сами записи читаются из cities по требованию
+class CityRegistry:
+    def __init__(self, cities, names=None, name_city=None, name_order=None, fuzzy=None):
+        self.cities = cities
+        if names is None:
+            names, name_city, name_order = build_name_index(cities)
+        self._name_city = name_city
+        self._order = name_order
+        self._sorted = SortedNames(names, name_order)
+        self._fuzzy = fuzzy if fuzzy is not None else build_fuzzy_index(names, name_city)
+
+    def get(self, name):
+        """Точный поиск города по eng_name или rus_name"""
+        name = normalize_city_name(name)
+        ix = bisect_left(self._sorted, name)
+        if ix < len(self._sorted) and self._sorted[ix] == name:
+            return self.cities[self._name_city[self._order[ix]]]
+        return None
+
+    def complete(self, prefix, limit=10):
+        """Города, названия которых начинаются с prefix, в алфавитном порядке"""
+        prefix = normalize_city_name(prefix)
+        found = []
+        ix = bisect_left(self._sorted, prefix)
+        while ix < len(self._sorted) and len(found) < limit and self._sorted[ix].startswith(prefix):
+            city_ix = self._name_city[self._order[ix]]
+            if city_ix not in found:
+                found.append(city_ix)
+            ix += 1
+        return [self.cities[city_ix] for city_ix in found]
+
+    def search(self, name, limit=5):
+        """Нечёткий поиск: список (расстояние, город), ближайшие первыми"""
+        return [(distance, self.cities[ix])
+                for distance, ix in self._fuzzy.search_values(normalize_city_name(name), limit)]
+
+    def match(self, name):
+        """Точное совпадение или ближайший город в пределах допустимого числа опечаток"""
+        city = self.get(name)
+        if city:
+            return city
+
+        ix = self._fuzzy.closest(normalize_city_name(name))
+        return None if ix is None else self.cities[ix]
+
+    def __len__(self):
+        return len(self.cities)
+
+# Реестр из снимка, если он собран и не старее CSV (индексы уже в снимке),
+# иначе из CSV с построением индексов
+def open_city_registry(csv_path=CSV_PATH, snapshot_path=SNAPSHOT_PATH):
+    try:
+        if os.path.getmtime(snapshot_path) >= os.path.getmtime(csv_path):
+            snapshot = CitySnapshot(snapshot_path)
+            fuzzy = TrigramIndex.from_tables(snapshot.names, snapshot.name_city, snapshot.postings)
+            return CityRegistry(snapshot, snapshot.names, snapshot.name_city, snapshot.name_order, fuzzy)
+    except FileNotFoundError:
+        pass
+    except (ValueError, struct.error) as e:
+        print(e)
+    return CityRegistry([City(**row) for row in load_city_data(csv_path)])
+
+
+_city_registry = None
+
+# Ленивая загрузка: справочник открывается при первом обращении
+def get_city_registry():
+    global _city_registry
+    if _city_registry is None:
+        _city_registry = open_city_registry()
+    return _city_registry
+
+
+# Сборка снимка: python load.py
+if __name__ == '__main__':
+    count = compile_city_data()
+    print(f"Снимок {SNAPSHOT_PATH} собран: {count} городов, {os.path.getsize(SNAPSHOT_PATH)} байт")
@@ -7,8 +7,16 @@ import logging
 
 from app.handlers import router
 from app.db.models import async_main
+from app.db.summary_cache import init_summary_cache
+from app.catalog import load_learned_stations
 from app.admin import admin as admin_router
+from app.client import HttpClient
 from app.middlewares.antispam import AntiSpamMiddleware
+from app.middlewares.http_client import HttpClientMiddleware
+from app.prefetch import MeteogramPrefetcher
+from app.stations import StationPoller
+from app.health import HealthMonitor
+from app.pik import pik_session
 
 # Настройка логирования
 logging.basicConfig(
@@ -32,18 +40,69 @@ antispam_middleware = AntiSpamMiddleware(
     bot=bot             # Добавление бота в конструктор
 )
 
+http_client = HttpClient(
+    limit=100,              # Всего соединений в пуле
+    limit_per_host=10,      # Соединений на один хост
+    dns_cache_ttl=300,      # Время жизни кэша DNS
+    keepalive_timeout=30    # Время удержания соединения
+)
+
+meteogram_prefetcher = MeteogramPrefetcher(
+    http=http_client,
+    top_n=20,           # Количество популярных городов
+    interval=10800,     # Интервал обновления 10800с = 3ч
+    jitter=300,         # Случайное смещение интервала
+    concurrency=4       # Одновременных загрузок
+)
+
+station_poller = StationPoller(
+    http=http_client,
+    interval=300,       # Интервал опроса АМС 300с = 5мин
+    jitter=15,          # Случайное смещение интервала
+    concurrency=20      # Одновременных запросов к api.weather.com
+)
+
+health_monitor = HealthMonitor(
+    http=http_client,
+    interval=600,       # Интервал проверки источников 600с = 10мин
+    retry_interval=60,  # Первая повторная проверка недоступного источника, далее пауза удваивается
+    timeout=15          # Срок на одну проверку
+)
+
+async def on_startup():
+    await http_client.start()
+    await pik_session.start()
+    # Проверки идут в фоне и не задерживают запуск
+    health_monitor.start()
+    meteogram_prefetcher.start()
+    station_poller.start()
+
+async def on_shutdown():
+    await health_monitor.stop()
+    await station_poller.stop()
+    await meteogram_prefetcher.stop()
+    await pik_session.close()
+    await http_client.close()
+
 # Функция запуска всех зависимостей
 async def main():
     try:
 
         await async_main()
+        await init_summary_cache()
+        await load_learned_stations()
         # Инициализация диспетчера
-        dp = Dispatcher()
+        dp = Dispatcher(meteogram_prefetcher=meteogram_prefetcher)
         dp.message.middleware(antispam_middleware)
+        dp.message.middleware(HttpClientMiddleware(http_client))
 
         # Подключение роутеров
         dp.include_routers(router, admin_router)
 
+        # Общий HTTP-клиент, фоновое обновление метеограмм и опрос АМС живут вместе с диспетчером
+        dp.startup.register(on_startup)
+        dp.shutdown.register(on_shutdown)
+
         logger.info("Starting bot...")
         await dp.start_polling(bot)
 
@@ -0,0 +1,79 @@
+# Замер поиска города по всему справочнику: python tests/bench_city_search.py
+# (из корня репозитория; снимок other/city_data.bin собирается python load.py)
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load import CitySnapshot, normalize_city_name, open_city_registry
+
+QUERIES = 500
+ALPHABET = 'АБВГДЕЖЗИЙКЛМНОПРСТУФХЦЧШЩЫЬЭЮЯ'
+
+
+# Одна опечатка: пропуск, замена, вставка или перестановка соседних букв
+def make_typo(name, rng):
+    i = rng.randrange(len(name))
+    kind = rng.choice(('delete', 'replace', 'insert', 'swap'))
+    if kind == 'delete':
+        return name[:i] + name[i + 1:]
+    if kind == 'replace':
+        return name[:i] + rng.choice(ALPHABET) + name[i + 1:]
+    if kind == 'insert':
+        return name[:i] + rng.choice(ALPHABET) + name[i:]
+    i = min(i, len(name) - 2)
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+def timed(func, queries):
+    results = []
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(func(query))
+        times.append((time.perf_counter() - start) * 1e6)
+    return results, times
+
+def report(title, times):
+    print(f"{title:<28} p50 {percentile(times, 0.5):7.1f} us   p95 {percentile(times, 0.95):7.1f} us")
+
+
+def main():
+    start = time.perf_counter()
+    registry = open_city_registry()
+    opened = (time.perf_counter() - start) * 1000
+    source = 'снимок' if isinstance(registry.cities, CitySnapshot) else 'CSV'
+    print(f"Справочник: {len(registry)} городов ({source}), открыт за {opened:.2f} мс")
+
+    rng = random.Random(1)
+    cities = [registry.cities[ix] for ix in range(len(registry))]
+    # Опечатки в названиях не короче 5 букв: в коротких одна правка даёт другой город
+    targets = rng.sample([city for city in cities if len(city.eng_name) >= 5], QUERIES)
+    typos = [make_typo(city.eng_name, rng) for city in targets]
+
+    # Первый проход прогревает страницы снимка
+    for query in typos:
+        registry.match(query)
+
+    _, times = timed(registry.get, [city.rus_name for city in targets])
+    report("get (точное название)", times)
+    _, times = timed(registry.get, [normalize_city_name(city.url.rsplit('/', 1)[-1][:-4]) for city in targets])
+    report("get (транслитерация)", times)
+    _, times = timed(registry.complete, [city.eng_name[:3] for city in targets])
+    report("complete (3 буквы)", times)
+    _, times = timed(registry.search, typos)
+    report("search (опечатка)", times)
+    found, times = timed(registry.match, typos)
+    report("match (опечатка)", times)
+
+    recovered = sum(city is not None and city.eng_name == target.eng_name for city, target in zip(found, targets))
+    print(f"Опечатки исправлены: {recovered}/{QUERIES}")
+
+
+if __name__ == '__main__':
+    main()
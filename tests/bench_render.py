@@ -0,0 +1,99 @@
+# Замер построения текстов сообщений и попадания в кэш готовых текстов по видам:
+# прогноз на день, на 3 дня и сводка МС за день.
+# Запуск из корня репозитория: python tests/bench_render.py
+# (импортирует app.handlers, поэтому нужна настроенная база данных в app/db/models.py)
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.forecast import Forecast
+from app.handlers import render_summary, render_weather, render_weather_one_day
+from app.render import RenderCache
+from app.summary import find_day, parse_summary_table
+
+RUNS = 2000
+CONDITIONS = ["Солнечно", "Переменная облачность", "Пасмурно", "Небольшой дождь", "Ливень", "Гроза"]
+
+
+# Ответ forecast.json на 3 дня с почасовыми данными (поля, которые читает бот)
+def make_forecast_data(seed=1):
+    rng = random.Random(seed)
+    days = []
+    for day in range(3):
+        date = f"2025-07-{day + 1:02d}"
+        hours = [{
+            'time': f"{date} {hour:02d}:00",
+            'temp_c': round(rng.uniform(12, 34), 1),
+            'wind_kph': round(rng.uniform(0, 60), 1),
+            'gust_kph': round(rng.uniform(0, 90), 1),
+            'precip_mm': round(rng.choice([0, 0, 0, rng.uniform(0, 5)]), 1),
+            'uv': rng.randint(0, 9),
+            'pressure_mb': round(rng.uniform(990, 1030), 1),
+            'dewpoint_c': round(rng.uniform(5, 22), 1),
+            'condition': {'text': rng.choice(CONDITIONS)},
+        } for hour in range(24)]
+        days.append({
+            'date': date,
+            'day': {
+                'maxtemp_c': max(hour['temp_c'] for hour in hours),
+                'mintemp_c': min(hour['temp_c'] for hour in hours),
+                'avghumidity': rng.randint(40, 90),
+                'maxwind_kph': max(hour['wind_kph'] for hour in hours),
+                'totalprecip_mm': round(sum(hour['precip_mm'] for hour in hours), 1),
+                'condition': {'text': rng.choice(CONDITIONS)},
+            },
+            'hour': hours,
+        })
+    return {'location': {'name': 'Москва', 'country': 'Россия'}, 'forecast': {'forecastday': days}}
+
+def new_forecast(data):
+    return Forecast(data=data, query='Москва', fetched_at=time.time())
+
+def measure(func, runs=RUNS):
+    """Среднее время вызова в микросекундах"""
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def main():
+    data = make_forecast_data()
+    warm = new_forecast(data)
+    warm.periods
+
+    with open(os.path.join(ROOT, 'tests', 'fixtures', 'summary_34123_2025_06.html'), encoding='utf-8') as f:
+        row = find_day(parse_summary_table(f.read()), '15.06.2025')
+    values = row.cells
+
+    views = [
+        ('day1', lambda cached: render_weather_one_day(cached)),
+        ('day3', lambda cached: render_weather(cached)),
+    ]
+    print(f"{'вид':<8}{'новые данные':>16}{'построение':>14}{'из кэша':>12}")
+    for view, render in views:
+        # Новые данные: почасовая сводка ещё не посчитана (первый запрос после загрузки прогноза)
+        first = measure(lambda: render(new_forecast(data)), RUNS // 10)
+        again = measure(lambda: render(warm))
+        cache = RenderCache()
+        key = warm.render_key(view)
+        cache.get_or_render(key, lambda: render(warm))
+        hit = measure(lambda: cache.get_or_render(warm.render_key(view), lambda: render(warm)))
+        print(f"{view:<8}{first:>13.1f} us{again:>11.1f} us{hit:>9.1f} us")
+
+    cache = RenderCache()
+    key = ('pogodaiklimat', '34123', '15.06.2025', values, 'summary')
+    cache.get_or_render(key, lambda: render_summary('34123', '15.06.2025', values))
+    render = measure(lambda: render_summary('34123', '15.06.2025', values))
+    hit = measure(lambda: cache.get_or_render(
+        ('pogodaiklimat', '34123', '15.06.2025', values, 'summary'),
+        lambda: render_summary('34123', '15.06.2025', values)))
+    print(f"{'summary':<8}{'-':>16}{render:>11.1f} us{hit:>9.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# Замер оценки уровня опасности на 10^5 наблюдений: прежний каскад if/elif,
+# табличная скалярная оценка и пакетная оценка столбцов NumPy.
+# Запуск из корня репозитория: python tests/bench_risk.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.risk import get_risk_level, risk_level, risk_levels
+from test_risk import LEVEL_BY_TEXT, PARAMS, boundary_cases, cascade_risk_level, random_cases
+
+COUNT = 100_000
+RUNS = 5
+
+
+def best_of(func, runs=RUNS):
+    """Лучшее время из runs запусков, мс, и результат"""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    cases = boundary_cases() + random_cases(COUNT)
+    rows = [tuple(case[name] for name in PARAMS) for case in cases]
+    columns = {name: np.array([case[name] for case in cases]) for name in PARAMS}
+
+    cascade_time, cascade = best_of(lambda: [
+        LEVEL_BY_TEXT[cascade_risk_level(t, w, g, uv, p, 50.0, d)] for t, w, g, uv, p, d in rows])
+    scalar_time, scalar = best_of(lambda: [
+        risk_level(temperature=t, wind_speed=w, wind_gust=g, uv_index=uv, pressure=p, dew_point=d)
+        for t, w, g, uv, p, d in rows])
+    texts_time, _ = best_of(lambda: [get_risk_level(t, w, g, uv, p, 50.0, d) for t, w, g, uv, p, d in rows])
+    batched_time, batched = best_of(lambda: risk_levels(**columns))
+
+    assert scalar == cascade
+    assert batched.tolist() == cascade
+    print(f"Наблюдений: {len(rows)}, результаты совпадают с каскадом")
+    print(f"каскад if/elif          {cascade_time:8.1f} мс  {cascade_time / len(rows) * 1000:6.2f} мкс/набл.")
+    print(f"risk_level (скалярно)   {scalar_time:8.1f} мс  {scalar_time / len(rows) * 1000:6.2f} мкс/набл.")
+    print(f"get_risk_level (текст)  {texts_time:8.1f} мс  {texts_time / len(rows) * 1000:6.2f} мкс/набл.")
+    print(f"risk_levels (пакетно)   {batched_time:8.1f} мс  {batched_time / len(rows) * 1000:6.2f} мкс/набл."
+          f"  ({cascade_time / batched_time:.0f}x быстрее каскада)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# Замер регистрации пользователя (set_user) на SQLite с 10^6 пользователей:
+# прежний SELECT + INSERT без индекса и вставка с игнорированием конфликта.
+# Запуск из корня репозитория: python tests/bench_set_user.py [число пользователей]
+# (импортирует app.db.models, поэтому в нём должен быть задан разбираемый URL базы;
+# сам замер идёт на временной базе SQLite)
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.db.models as models
+import app.db.requests as requests
+from app.db.models import User
+from app.db.requests import KnownUsers, set_user
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+DUPLICATES = 5
+CALLS = 200
+
+
+# Таблица users в прежнем виде (без индекса на tg_id) с users пользователями и дубликатами
+def create_legacy_table(path, users):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER NOT NULL PRIMARY KEY, tg_id BIGINT)")
+    conn.executemany("INSERT INTO users (tg_id) VALUES (?)", ((tg_id,) for tg_id in range(users)))
+    conn.executemany("INSERT INTO users (tg_id) VALUES (?)", ((tg_id,) for tg_id in range(DUPLICATES)))
+    conn.commit()
+    conn.close()
+
+# Прежний set_user: поиск пользователя и вставка, если его нет
+async def old_set_user(tg_id):
+    async with models.async_session() as session:
+        user = await session.scalar(select(User).where(User.tg_id == tg_id))
+        if not user:
+            session.add(User(tg_id=tg_id))
+            await session.commit()
+
+async def per_call(func, ids):
+    """Среднее время вызова, мс"""
+    start = time.perf_counter()
+    for tg_id in ids:
+        await func(tg_id)
+    return (time.perf_counter() - start) / len(ids) * 1000
+
+async def count_rows(tg_id):
+    async with models.async_session() as session:
+        return await session.scalar(select(func.count()).select_from(User).where(User.tg_id == tg_id))
+
+def report(title, value, unit='мс/вызов'):
+    print(f"{title:<42}{value:10.3f} {unit}")
+
+
+async def main(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    models.engine = engine
+    models.async_session = requests.async_session = async_sessionmaker(engine)
+    rng = random.Random(1)
+    existing = rng.sample(range(USERS), CALLS)
+    new_ids = iter(range(USERS, USERS * 2))
+
+    try:
+        # Прежний код: полный просмотр таблицы на каждый /start
+        old_calls = CALLS // 10
+        report("прежний select+insert, есть в базе", await per_call(old_set_user, existing[:old_calls]))
+        report("прежний select+insert, новый", await per_call(
+            old_set_user, [next(new_ids) for _ in range(old_calls)]))
+
+        start = time.perf_counter()
+        await models.async_main()
+        report("удаление дубликатов и индекс (один раз)", time.perf_counter() - start, 'сек.')
+        start = time.perf_counter()
+        await models.async_main()
+        report("повторный запуск", time.perf_counter() - start, 'сек.')
+        assert await count_rows(0) == 1
+
+        requests.known_users = KnownUsers()
+        report("новый upsert, есть в базе (не в памяти)", await per_call(set_user, existing))
+        report("новый upsert, новый", await per_call(set_user, [next(new_ids) for _ in range(CALLS)]))
+        report("повторный /start, из памяти", await per_call(set_user, existing * 100) * 1000, 'мкс/вызов')
+
+        # Одновременные /start одного нового пользователя
+        requests.known_users = KnownUsers()
+        tg_id = next(new_ids)
+        await asyncio.gather(*(set_user(tg_id) for _ in range(50)))
+        print(f"50 одновременных вставок одного tg_id: строк {await count_rows(tg_id)}")
+    finally:
+        await engine.dispose()
+
+    tracemalloc.start()
+    known = KnownUsers()
+    for tg_id in range(10**9, 10**9 + known.maxsize):
+        known.add(tg_id)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"KnownUsers на {known.maxsize} tg_id: {size / 1024 / 1024:.1f} МБ")
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'users.db')
+        start = time.perf_counter()
+        create_legacy_table(path, USERS)
+        print(f"Пользователей: {USERS} + {DUPLICATES} дубликатов, база собрана за {time.perf_counter() - start:.1f} сек.")
+        asyncio.run(main(path))
@@ -0,0 +1,63 @@
+# Замер разбора страниц summary.php из этой папки: время и пиковая память (tracemalloc)
+# прежнего кода и обоих способов разбора app.summary.
+# Запуск из корня репозитория: python tests/fixtures/bench_summary_parse.py
+import os
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+FIXTURES = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(FIXTURES)))
+
+from app.summary import SUMMARY_PARSERS
+
+RUNS = 20
+
+
+# Прежний код set_summary: разбор всей страницы html.parser и поиск строки за день
+def previous_parse(html, date_str):
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table", {"class": "tab"})
+    if not table:
+        return None
+    for row in table.find_all("tr")[2:]:
+        cols = row.find_all("td")
+        if not cols or len(cols) < 15:
+            continue
+        if cols[2].get_text(strip=True) == date_str:
+            return [col.get_text(strip=True) for col in cols]
+    return None
+
+def measure(func, html):
+    """Среднее время разбора, мс, и пиковая память одного разбора, КиБ"""
+    func(html)
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        func(html)
+    elapsed = (time.perf_counter() - start) / RUNS * 1000
+
+    tracemalloc.start()
+    func(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024
+
+
+def main():
+    pages = sorted(name for name in os.listdir(FIXTURES) if name.endswith('.html'))
+    parsers = [('прежний код (один день)', lambda html: previous_parse(html, '15.06.2025'))]
+    parsers += [(f"{name} (все строки)", parser) for name, parser in sorted(SUMMARY_PARSERS.items())]
+
+    for page in pages:
+        with open(os.path.join(FIXTURES, page), encoding='utf-8') as f:
+            html = f.read()
+        print(f"{page} ({len(html.encode('utf-8')) / 1024:.1f} КиБ)")
+        for title, parser in parsers:
+            elapsed, peak = measure(parser, html)
+            print(f"  {title:<26}{elapsed:8.2f} мс {peak:9.0f} КиБ")
+
+
+if __name__ == '__main__':
+    main()
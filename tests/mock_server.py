@@ -0,0 +1,27 @@
+from aiohttp import web
+
+
+# Локальный HTTP-сервер для тестов: маршруты GET, случайный свободный порт.
+# Обработчик отменяется, когда клиент закрывает соединение, - зависшие ответы
+# не задерживают остановку сервера
+class MockServer:
+    def __init__(self, routes: dict):
+        self.app = web.Application()
+        for path, handler in routes.items():
+            self.app.router.add_get(path, handler)
+        self._runner = None
+        self.port = None
+
+    async def __aenter__(self):
+        self._runner = web.AppRunner(self.app, handler_cancellation=True)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}{path}"
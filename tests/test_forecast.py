@@ -0,0 +1,98 @@
+import asyncio
+import random
+
+from aiohttp import web
+
+import app.forecast as forecast
+from app.cache import TTLCache
+from app.client import HttpClient
+from mock_server import MockServer
+
+
+# Мок forecast.json: запоминает запросы и отвечает с небольшой задержкой,
+# чтобы одновременные запросы одной ячейки успели объединиться
+def forecast_server(requests):
+    async def handler(request):
+        requests.append(request.query['q'])
+        await asyncio.sleep(0.02)
+        return web.json_response({'location': {'name': request.query['q']}, 'current': {},
+                                  'forecast': {'forecastday': []}})
+    return MockServer({'/v1/forecast.json': handler})
+
+
+async def replay(monkeypatch, points, burst, cache):
+    requests = []
+    async with forecast_server(requests) as server:
+        monkeypatch.setattr(forecast, 'FORECAST_URL', server.url('/v1/forecast.json'))
+        monkeypatch.setattr(forecast, 'spatial_cache', cache)
+        monkeypatch.setattr(forecast, 'WEATHER_TOKEN', 'test-key')
+        http = HttpClient()
+        await http.start()
+        try:
+            results = []
+            for i in range(0, len(points), burst):
+                results += await asyncio.gather(*(
+                    forecast.get_forecast_by_coords(http, lat, lon) for lat, lon in points[i:i + burst]))
+        finally:
+            await http.close()
+    return requests, results
+
+
+# Пользователи в радиусе ~2 км от центра Воронежа приходят пачками по 50
+def cluster(count=1000, seed=3):
+    rng = random.Random(seed)
+    return [(51.66 + rng.gauss(0, 0.01), 39.20 + rng.gauss(0, 0.015)) for _ in range(count)]
+
+
+def test_nearby_users_share_one_request_per_cell(monkeypatch):
+    points = cluster()
+    cache = TTLCache(ttl=300)
+    requests, results = asyncio.run(replay(monkeypatch, points, burst=50, cache=cache))
+
+    cells = {forecast.snap_to_grid(lat, lon) for lat, lon in points}
+    # Одно обращение к API на ячейку, запрос - по центру ячейки
+    assert sorted(requests) == sorted(f"{lat},{lon}" for lat, lon in cells)
+    for (lat, lon), result in zip(points, results):
+        cell = forecast.snap_to_grid(lat, lon)
+        assert result.query == f"{cell[0]},{cell[1]}"
+
+    assert cache.misses == len(cells)
+    assert cache.hits + cache.coalesced + cache.misses == len(points)
+    assert cache.coalesced > 0
+    assert cache.hit_rate > 0.95
+
+
+def test_concurrent_requests_in_one_cell_are_coalesced(monkeypatch):
+    # 50 точек в пределах 100 м друг от друга и от краёв одной ячейки
+    rng = random.Random(1)
+    points = [(51.675 + rng.uniform(-0.001, 0.001), 39.225 + rng.uniform(-0.001, 0.001)) for _ in range(50)]
+    cache = TTLCache(ttl=300)
+    requests, results = asyncio.run(replay(monkeypatch, points, burst=50, cache=cache))
+
+    assert len(requests) == 1
+    assert cache.misses == 1 and cache.coalesced == 49
+    assert all(result is results[0] for result in results)
+
+
+def test_expired_cell_is_fetched_again(monkeypatch):
+    points = [(51.671, 39.221), (51.672, 39.222)]
+    cache = TTLCache(ttl=0.05)
+
+    async def main():
+        first = await replay(monkeypatch, points[:1], burst=1, cache=cache)
+        await asyncio.sleep(0.1)
+        second = await replay(monkeypatch, points[1:], burst=1, cache=cache)
+        return first[0] + second[0]
+
+    assert len(asyncio.run(main())) == 2
+    assert cache.misses == 2
+
+
+def test_snap_to_grid_cells():
+    step = forecast.GRID_STEP
+    # Точки одной ячейки дают один центр, соседние ячейки - разные
+    assert forecast.snap_to_grid(51.6501, 39.2001) == forecast.snap_to_grid(51.6999, 39.2499)
+    assert forecast.snap_to_grid(51.6499, 39.2001) != forecast.snap_to_grid(51.6501, 39.2001)
+    lat, lon = forecast.snap_to_grid(-33.87, 151.21)
+    assert abs(lat - (-33.875)) < 1e-9 and abs(lon - 151.225) < 1e-9
+    assert forecast.snap_to_grid(0.0, 0.0) == (round(step / 2, 4), round(step / 2, 4))
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+import app.pik as pik
+import load
+from app.client import HttpClient
+from app.health import HealthMonitor, ProviderHealth
+from load import City
+from mock_server import MockServer
+
+
+# Одна ссылка на метеограмму и страница входа pogodaiklimat.ru на локальном сервере
+def probe(monkeypatch, provider, status):
+    seen = []
+
+    async def handler(request):
+        seen.append(request.method)
+        return web.Response(status=status)
+
+    async def main():
+        async with MockServer({'/page': handler}) as server:
+            city = City('МОСКВА', 'Москва', server.url('/page'))
+            monkeypatch.setattr(load, 'get_city_registry', lambda: {'МОСКВА': city})
+            monkeypatch.setattr(pik, 'LOGIN', 'user')
+            monkeypatch.setattr(pik, 'PASSWORD', 'secret')
+            monkeypatch.setattr(pik, 'LOGIN_URL', server.url('/page'))
+            http = HttpClient()
+            await http.start()
+            try:
+                health = ProviderHealth()
+                await HealthMonitor(http, health, timeout=5).refresh([provider])
+                return health.get(provider)
+            finally:
+                await http.close()
+
+    return asyncio.run(main()), seen
+
+
+@pytest.mark.parametrize('provider', ['gmc', 'pik'])
+@pytest.mark.parametrize('status', [200, 403, 404, 405])
+def test_client_errors_do_not_mark_provider_down(monkeypatch, provider, status):
+    result, seen = probe(monkeypatch, provider, status)
+    assert result.ok
+    assert seen == ['GET']
+
+
+@pytest.mark.parametrize('provider', ['gmc', 'pik'])
+@pytest.mark.parametrize('status', [500, 503])
+def test_server_errors_mark_provider_down(monkeypatch, provider, status):
+    result, _ = probe(monkeypatch, provider, status)
+    assert not result.ok
+    assert str(status) in result.detail
@@ -0,0 +1,50 @@
+import load
+from load import CitySnapshot, compile_city_data, open_city_registry
+
+
+# Снимок, который запоминает смещения разделов при чтении
+class RecordingSnapshot(CitySnapshot):
+    def __init__(self, snapshot_path):
+        self.sections = []
+        super().__init__(snapshot_path)
+
+    def _read_uints(self):
+        self.sections.append(self._pos)
+        return super()._read_uints()
+
+    def _read_strings(self):
+        self.sections.append(self._pos)
+        return super()._read_strings()
+
+
+def test_snapshot_sections_are_aligned(tmp_path):
+    snapshot_path = tmp_path / 'city_data.bin'
+    compile_city_data(snapshot_path=snapshot_path)
+    snapshot = RecordingSnapshot(snapshot_path)
+    assert len(snapshot.sections) == 9
+    assert all(pos % 4 == 0 for pos in snapshot.sections)
+
+
+def test_snapshot_matches_csv(tmp_path):
+    snapshot_path = tmp_path / 'city_data.bin'
+    compile_city_data(snapshot_path=snapshot_path)
+    snapshot = open_city_registry(snapshot_path=snapshot_path)
+    parsed = open_city_registry(snapshot_path=tmp_path / 'missing.bin')
+    assert isinstance(snapshot.cities, CitySnapshot)
+    assert list(snapshot.cities) == list(parsed.cities)
+    for name in ('Москва', 'moskva', 'WOLOKOLAMSK', 'Масква', 'Волокаламск'):
+        assert snapshot.get(name) == parsed.get(name)
+        assert snapshot.match(name) == parsed.match(name)
+    assert snapshot.complete('вол') == parsed.complete('вол')
+
+
+def test_old_snapshot_is_rejected(tmp_path, capsys):
+    snapshot_path = tmp_path / 'city_data.bin'
+    compile_city_data(snapshot_path=snapshot_path)
+    data = bytearray(snapshot_path.read_bytes())
+    data[:4] = b'CIT2'
+    snapshot_path.write_bytes(bytes(data))
+    registry = open_city_registry(snapshot_path=snapshot_path)
+    assert not isinstance(registry.cities, CitySnapshot)
+    assert load.SNAPSHOT_MAGIC != b'CIT2'
+    assert 'Неподходящий снимок' in capsys.readouterr().out
@@ -0,0 +1,125 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+import app.pws as pws
+from app.client import HttpClient
+from mock_server import MockServer
+
+
+def make_client(total=2):
+    return HttpClient(timeouts={'pws': aiohttp.ClientTimeout(total=total)})
+
+
+# Пока запрос к станции висит, другие обработчики (тот же пул соединений и event loop)
+# продолжают обслуживаться без задержек
+def test_stalled_station_does_not_block_other_requests(monkeypatch):
+    stalled = asyncio.Event()
+
+    async def slow(request):
+        stalled.set()
+        await asyncio.sleep(30)
+        return web.json_response({})
+
+    async def fast(request):
+        return web.json_response({'ok': True})
+
+    async def main():
+        async with MockServer({'/slow': slow, '/fast': fast}) as server:
+            monkeypatch.setattr(pws, 'PWS_URL', server.url('/slow'))
+            http = make_client()
+            await http.start()
+            try:
+                station = asyncio.create_task(
+                    pws.fetch_observation(http, 'STALLED', 'key', deadline=1, backoff=0.1))
+                await stalled.wait()
+
+                # Другие обработчики: 20 запросов и тики event loop каждые 10 мс
+                async def other_handler():
+                    start = time.perf_counter()
+                    async with http.get(server.url('/fast')) as response:
+                        assert (await response.json())['ok']
+                    return time.perf_counter() - start
+
+                lags = []
+                for _ in range(20):
+                    start = time.perf_counter()
+                    await asyncio.sleep(0.01)
+                    lags.append(time.perf_counter() - start - 0.01)
+                latencies = await asyncio.gather(*(other_handler() for _ in range(20)))
+
+                assert not station.done()
+                assert max(latencies) < 0.5
+                assert max(lags) < 0.05
+
+                with pytest.raises(pws.PwsUnavailable):
+                    await station
+            finally:
+                await http.close()
+
+    asyncio.run(main())
+
+
+def test_deadline_bounds_total_time(monkeypatch):
+    async def slow(request):
+        await asyncio.sleep(30)
+        return web.json_response({})
+
+    async def main():
+        async with MockServer({'/slow': slow}) as server:
+            monkeypatch.setattr(pws, 'PWS_URL', server.url('/slow'))
+            http = make_client(total=10)
+            await http.start()
+            try:
+                start = time.perf_counter()
+                with pytest.raises(pws.PwsUnavailable):
+                    await pws.fetch_observation(http, 'STALLED', 'key', deadline=0.5)
+                assert time.perf_counter() - start < 1.5
+            finally:
+                await http.close()
+
+    asyncio.run(main())
+
+
+def test_retries_transient_errors(monkeypatch):
+    calls = []
+
+    async def flaky(request):
+        calls.append(request.query['stationId'])
+        if len(calls) < 3:
+            return web.Response(status=503)
+        return web.json_response({'observations': [{'stationID': 'X', 'metric': {'temp': 20}}]})
+
+    async def main():
+        async with MockServer({'/flaky': flaky}) as server:
+            monkeypatch.setattr(pws, 'PWS_URL', server.url('/flaky'))
+            http = make_client()
+            await http.start()
+            try:
+                return await pws.fetch_observation(http, 'X', 'key', backoff=0.05)
+            finally:
+                await http.close()
+
+    observation = asyncio.run(main())
+    assert observation['metric']['temp'] == 20
+    assert len(calls) == 3
+
+
+def test_no_data_is_not_an_error(monkeypatch):
+    async def empty(request):
+        return web.Response(status=204)
+
+    async def main():
+        async with MockServer({'/empty': empty}) as server:
+            monkeypatch.setattr(pws, 'PWS_URL', server.url('/empty'))
+            http = make_client()
+            await http.start()
+            try:
+                return await pws.fetch_observation(http, 'X', 'key')
+            finally:
+                await http.close()
+
+    assert asyncio.run(main()) is None
@@ -0,0 +1,32 @@
+from app.render import RenderCache, key_size
+
+
+def test_hits_and_misses():
+    cache = RenderCache()
+    assert cache.get_or_render(('a', 1), lambda: 'one') == 'one'
+    assert cache.get_or_render(('a', 1), lambda: 'other') == 'one'
+    assert cache.get_or_render(('a', 2), lambda: 'two') == 'two'
+    assert (cache.hits, cache.misses) == (1, 2)
+    stats = cache.stats()
+    assert (stats['texts'], stats['hits'], stats['misses']) == (2, 1, 2)
+    assert stats['hit_rate'] == 1 / 3
+    assert stats['bytes'] == cache.size
+
+
+def test_key_counts_towards_size():
+    rows = tuple(('01.06.2025', ('x' * 100,) * 40) for _ in range(30))
+    key = ('pogodaiklimat', '34123', rows, 'summary_period')
+    cache = RenderCache(max_bytes=key_size(key) * 2)
+    for ix in range(5):
+        cache.get_or_render(key + (ix,), lambda: 'text')
+    assert len(cache) <= 2
+    assert cache.size <= cache.max_bytes
+
+
+def test_eviction_restores_size():
+    cache = RenderCache(max_bytes=10_000)
+    for ix in range(1000):
+        cache.get_or_render(('view', ix), lambda: 'x' * 100)
+    assert cache.size == sum(cache._sizes.values())
+    assert cache.size <= cache.max_bytes
+    assert set(cache._sizes) == set(cache._texts)
@@ -0,0 +1,170 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from app.risk import RISK_LEVELS, RISK_THRESHOLDS, get_risk_level, risk_level, risk_levels
+
+
+# Прежняя реализация из handlers.py (каскад if/elif) - эталон для сравнения
+def cascade_risk_level(temperature, wind_speed_ms, wind_gust_ms, uv_index, pressure, humidity, dew_point):
+    levels = []
+
+    # Температура
+    if temperature >= 45 or temperature <= -45:
+        levels.append(5)
+    elif temperature >= 40 or temperature <= -35:
+        levels.append(4)
+    elif temperature >= 35 or temperature <= -25:
+        levels.append(3)
+    elif temperature >= 30 or temperature <= -15:
+        levels.append(2)
+    else:
+        levels.append(1)
+
+    # Скорость ветра (постоянная)
+    if wind_speed_ms >= 25:
+        levels.append(5)
+    elif wind_speed_ms >= 20:
+        levels.append(4)
+    elif wind_speed_ms >= 15:
+        levels.append(3)
+    elif wind_speed_ms >= 7:
+        levels.append(2)
+    else:
+        levels.append(1)
+
+    # Порывы ветра
+    if wind_gust_ms >= 33:
+        levels.append(5)
+    elif wind_gust_ms >= 25:
+        levels.append(4)
+    elif wind_gust_ms >= 20:
+        levels.append(3)
+    elif wind_gust_ms >= 10:
+        levels.append(2)
+    else:
+        levels.append(1)
+
+    # УФ-индекс
+    if uv_index >= 11:
+        levels.append(5)
+    elif uv_index >= 9:
+        levels.append(4)
+    elif uv_index >= 7:
+        levels.append(3)
+    elif uv_index >= 3:
+        levels.append(2)
+    else:
+        levels.append(1)
+
+    # Давление
+    if pressure <= 950 or pressure >= 1080:
+        levels.append(5)
+    elif pressure <= 970 or pressure >= 1060:
+        levels.append(4)
+    elif pressure <= 980 or pressure >= 1040:
+        levels.append(3)
+    elif pressure <= 990 or pressure >= 1020:
+        levels.append(2)
+    else:
+        levels.append(1)
+
+    # Влажность — всегда 1 (удалены уровни опасности)
+    levels.append(1)
+
+    # Точка росы (высокая - опасность)
+    if dew_point >= 25:
+        levels.append(5)
+    elif dew_point >= 20:
+        levels.append(4)
+    elif dew_point >= 16:
+        levels.append(3)
+    elif dew_point >= 12:
+        levels.append(2)
+    else:
+        levels.append(1)
+
+    max_level = max(levels)
+
+    level_map = {
+        1: "🟢 Дискомфорт отсутвует",
+        2: "🟡 Лёгкий дискомфорт",
+        3: "🟠 Повышенный дискомфорт",
+        4: "🔴 Дискомфорт высокой опасности",
+        5: "🟣 Дискомфорт экстремальной опасности"
+    }
+
+    return level_map[max_level]
+
+
+LEVEL_BY_TEXT = {text: level for level, text in RISK_LEVELS.items()}
+PARAMS = ('temperature', 'wind_speed', 'wind_gust', 'uv_index', 'pressure', 'dew_point')
+# Спокойная погода: все параметры на уровне 1
+CALM = {'temperature': 20.0, 'wind_speed': 2.0, 'wind_gust': 4.0, 'uv_index': 1.0,
+        'pressure': 1005.0, 'dew_point': 5.0}
+
+
+def cascade_level(values, humidity=50.0):
+    text = cascade_risk_level(values['temperature'], values['wind_speed'], values['wind_gust'],
+                              values['uv_index'], values['pressure'], humidity, values['dew_point'])
+    return LEVEL_BY_TEXT[text]
+
+
+# Каждый порог, ближайшие к нему числа с обеих сторон и значения на полшага в стороне
+def boundary_cases():
+    cases = []
+    for name, scale in RISK_THRESHOLDS.items():
+        for threshold in scale.get('high', ()) + scale.get('low', ()):
+            for value in (threshold, math.nextafter(threshold, -math.inf), math.nextafter(threshold, math.inf),
+                          threshold - 0.5, threshold + 0.5):
+                cases.append({**CALM, name: float(value)})
+    return cases
+
+
+def random_cases(count, seed=17):
+    rng = random.Random(seed)
+    ranges = {'temperature': (-60, 60), 'wind_speed': (0, 40), 'wind_gust': (0, 50),
+              'uv_index': (0, 14), 'pressure': (930, 1100), 'dew_point': (-40, 35)}
+    cases = []
+    for _ in range(count):
+        case = {}
+        for name, (low, high) in ranges.items():
+            # Половина значений целые: так чаще попадаются сами пороги
+            value = rng.uniform(low, high)
+            case[name] = float(round(value)) if rng.random() < 0.5 else value
+        cases.append(case)
+    return cases
+
+
+@pytest.mark.parametrize('values', boundary_cases())
+def test_risk_level_matches_cascade_at_boundaries(values):
+    assert risk_level(**values) == cascade_level(values)
+
+
+def test_get_risk_level_matches_cascade():
+    for values in boundary_cases() + random_cases(10_000):
+        expected = cascade_risk_level(values['temperature'], values['wind_speed'], values['wind_gust'],
+                                      values['uv_index'], values['pressure'], 50.0, values['dew_point'])
+        assert get_risk_level(values['temperature'], values['wind_speed'], values['wind_gust'],
+                              values['uv_index'], values['pressure'], 50.0, values['dew_point']) == expected
+
+
+def test_risk_levels_matches_cascade():
+    cases = boundary_cases() + random_cases(100_000)
+    columns = {name: np.array([case[name] for case in cases]) for name in PARAMS}
+    expected = np.array([cascade_level(case) for case in cases], dtype=np.int8)
+    np.testing.assert_array_equal(risk_levels(**columns), expected)
+
+
+def test_humidity_is_ignored():
+    for humidity in (0.0, 50.0, 100.0):
+        assert cascade_level(CALM, humidity) == 1
+    assert risk_levels(humidity=np.array([0.0, 100.0]), **{name: np.full(2, CALM[name]) for name in PARAMS}).tolist() == [1, 1]
+
+
+def test_missing_values_are_skipped():
+    assert risk_level(**{**CALM, 'temperature': None, 'pressure': float('nan')}) == 1
+    levels = risk_levels(temperature=np.array([np.nan, 46.0]), wind_speed=np.array([30.0, np.nan]))
+    assert levels.tolist() == [5, 5]
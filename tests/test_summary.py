@@ -0,0 +1,159 @@
+import asyncio
+import os
+import time
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.db.summary_cache as summary_cache
+import app.summary as summary
+from app.health import ProviderStatus, ProviderUnavailable, provider_health
+from app.summary import parse_summary_table, parse_summary_table_bs4
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+PAGES = sorted(name for name in os.listdir(FIXTURES) if name.startswith('summary_'))
+
+
+def load(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+# Быстрый разбор lxml должен давать те же строки, что и BeautifulSoup
+@pytest.mark.parametrize('name', PAGES)
+def test_lxml_matches_bs4(name):
+    pytest.importorskip('lxml')
+    html = load(name)
+    assert summary.parse_summary_table_lxml(html) == parse_summary_table_bs4(html)
+
+
+# Конец таблицы ищется без учёта регистра: иначе фрагмент доходит до конца страницы
+# и lxml не может его разобрать
+@pytest.mark.parametrize('end_tag', ['</TABLE>', '</Table >'])
+def test_lxml_end_tag_case(end_tag):
+    pytest.importorskip('lxml')
+    html = load('summary_34123_2025_06.html').replace('</table>', end_tag)
+    rows = summary.parse_summary_table_lxml(html)
+    assert len(rows) == 30
+    assert rows == parse_summary_table_bs4(html)
+
+
+def test_month_page():
+    rows = parse_summary_table(load('summary_34123_2025_06.html'))
+    assert [row.date for row in rows] == [f"{day:02d}.06.2025" for day in range(1, 31)]
+
+    row = summary.find_day(rows, '15.06.2025')
+    assert row.text('station_name') == 'Воронеж'
+    assert row.text('temp_avg') == '22.8'       # знак '+' отбрасывается
+    assert row.number('temp_max') == 27.8
+    assert row.number('precip_total') == 9.2
+    assert len(row.cells) == 41
+
+
+def test_leap_february():
+    rows = parse_summary_table(load('summary_34123_2024_02.html'))
+    assert len(rows) == 29
+    assert rows[-1].date == '29.02.2024'
+
+
+def test_edge_markup():
+    # Несколько классов у таблицы, вложенные теги и переносы в ячейках, &nbsp;,
+    # комментарии, пробелы вокруг даты, заглавные теги и строка итогов без данных
+    rows = parse_summary_table(load('summary_edge_markup.html'))
+    assert [row.date for row in rows] == [f"{day:02d}.01.2024" for day in range(1, 6)]
+    assert rows[0].text('temp_avg') == '1.5'
+    assert rows[0].number('pressure_avg') == 1015.6
+    assert rows[0].text('precip_total') == '<0.1'
+    assert rows[0].number('precip_total') is None
+
+
+def test_unclosed_table():
+    rows = parse_summary_table(load('summary_unclosed_table.html'))
+    assert [row.date for row in rows] == ['01.03.2024', '02.03.2024', '03.03.2024']
+
+
+@pytest.mark.parametrize('parser', sorted(summary.SUMMARY_PARSERS))
+def test_page_without_table(parser):
+    assert parse_summary_table(load('summary_no_table.html'), parser) is None
+
+
+def test_falls_back_to_bs4(monkeypatch):
+    def broken(html):
+        raise ValueError("broken parser")
+
+    monkeypatch.setitem(summary.SUMMARY_PARSERS, 'broken', broken)
+    html = load('summary_34123_2025_06.html')
+    assert parse_summary_table(html, 'broken') == parse_summary_table_bs4(html)
+
+
+# Кэш summary.php во временной базе; pik_session.fetch отдаёт страницу-образец и считает запросы
+def run_with_cache(tmp_path, monkeypatch, scenario):
+    fetched = []
+
+    async def fetch(url):
+        fetched.append(url)
+        return load('summary_34123_2025_06.html')
+
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'summary_cache.db'}")
+        monkeypatch.setattr(summary_cache, 'engine', engine)
+        monkeypatch.setattr(summary_cache, 'async_session', async_sessionmaker(engine))
+        try:
+            await summary_cache.init_summary_cache()
+            return await scenario()
+        finally:
+            await engine.dispose()
+
+    monkeypatch.setattr(summary.pik_session, 'fetch', fetch)
+    monkeypatch.setattr(provider_health, '_statuses', {})
+    return asyncio.run(main()), fetched
+
+def mark_pik_down():
+    provider_health.update(ProviderStatus('pik', False, 'статус 503', time.time(), 0.1))
+
+
+# Сайт недоступен: месяцы из кэша выдаются, за остальными сайт не запрашивается
+def test_cached_month_is_served_while_pik_is_down(tmp_path, monkeypatch):
+    async def scenario():
+        await summary.fetch_summary_month('34123', 2025, 6)
+        mark_pik_down()
+        rows = await summary.fetch_summary_month('34123', 2025, 6)
+        with pytest.raises(ProviderUnavailable):
+            await summary.fetch_summary_month('34123', 2025, 7)
+        return rows
+
+    rows, fetched = run_with_cache(tmp_path, monkeypatch, scenario)
+    assert len(rows) == 30
+    assert len(fetched) == 1
+
+
+# Устаревшая таблица текущего месяца не обновляется, пока сайт недоступен
+def test_stale_current_month_is_served_while_pik_is_down(tmp_path, monkeypatch):
+    async def scenario():
+        await summary.fetch_summary_month('34123', 2025, 6)
+        monkeypatch.setattr(summary_cache, 'CURRENT_MONTH_TTL', -1)
+        assert await summary_cache.get_month('34123', 2025, 6) is None
+        mark_pik_down()
+        return await summary.fetch_summary_month('34123', 2025, 6)
+
+    monkeypatch.setattr(summary, 'is_complete_month', lambda year, month: False)
+    rows, fetched = run_with_cache(tmp_path, monkeypatch, scenario)
+    assert len(rows) == 30
+    assert len(fetched) == 1
+
+
+# Период: месяцы из кэша считаются, недоступные - пропущенными
+def test_range_uses_cached_months_while_pik_is_down(tmp_path, monkeypatch):
+    async def scenario():
+        await summary.fetch_summary_month('34123', 2025, 6)
+        mark_pik_down()
+        rows, missing = await summary.fetch_summary_range(
+            '34123', summary.date(2025, 6, 10), summary.date(2025, 7, 10))
+        with pytest.raises(ProviderUnavailable):
+            await summary.fetch_summary_range('34123', summary.date(2025, 8, 1), summary.date(2025, 9, 1))
+        return rows, missing
+
+    (rows, missing), fetched = run_with_cache(tmp_path, monkeypatch, scenario)
+    assert [rows[0].date, rows[-1].date] == ['10.06.2025', '30.06.2025']
+    assert missing == 1
+    assert len(fetched) == 1